@@ -0,0 +1,373 @@
+"""Local HTTP/JSON API over ContactService, so other services can share the book.
+
+Standard library only (asyncio); start it with `python cli.py serve`.
+
+    GET    /contacts?limit=&after=&sort=&desc=    one page plus a "next" cursor for `after`
+    GET    /contacts/<id>
+    POST   /contacts                               add; body {"first", "last", "address", "number"}
+    PATCH  /contacts/<id>                          change only the fields given
+    DELETE /contacts/<id>
+    GET    /search?q=&field=&limit=&fuzzy=
+    GET    /health                                 counts and response cache stats
+
+The event loop only parses, routes and replies. Reads run on a pool of
+worker threads, each with its own pooled connection (database.py keeps
+one per thread); writes go through a WriteQueue, so they are serialized
+and group committed. List and search replies carry an ETag derived from
+database.get_contacts_version() and database.get_data_version(), so writes
+made by the GUI, the CLI or another server on the same book change it too:
+a matching If-None-Match gets 304, and an unchanged reply is served from
+memory without touching the database.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs, urlsplit
+
+import database
+import instrumentation
+from database import Contact, DuplicatePhoneError, SEARCH_FIELDS, SORT_COLUMNS
+from service import ContactService, ValidationError, BookFullError, ContactNotFoundError
+from write_queue import WriteQueue
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_WORKERS = 8
+CACHE_ENTRIES = 512
+MAX_PAGE = 1000
+MAX_BODY = 64 * 1024
+
+FIELDS = ("first", "last", "address", "number")
+
+REASONS = {
+    200: "OK", 201: "Created", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class ResponseCache:
+    """Encoded list/search replies by request target, each valid for one data state.
+
+    Only touched from the event loop thread, so it needs no lock.
+    """
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, state):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != state:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, state, body):
+        self._entries[key] = (state, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+def _json(value):
+    return json.dumps(value, separators=(",", ":")).encode()
+
+def _param(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+def _int_param(query, name, default, low=None, high=None):
+    value = _param(query, name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be an integer.") from None
+    if low is not None and number < low or high is not None and number > high:
+        raise HTTPError(400, f"{name} must be between {low} and {high}.")
+    return number
+
+def _choice_param(query, name, choices, default):
+    value = _param(query, name, default)
+    if value not in choices:
+        raise HTTPError(400, f"{name} must be one of: {', '.join(choices)}.")
+    return value
+
+def _flag_param(query, name):
+    return _param(query, name, "0").lower() in ("1", "true", "yes")
+
+def _encode_cursor(contact, order_by):
+    # The last row's sort value and id rather than just its id: the next page seeks
+    # past those, so it does not depend on that contact still existing unchanged
+    data = _json([order_by, getattr(contact, order_by), contact.id])
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor, order_by):
+    """The page anchor a "next" cursor stands for, as a Contact with only the sort field and id set."""
+    try:
+        sort, value, contact_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise HTTPError(400, "after must be a cursor from a previous page.") from None
+    if sort != order_by:
+        raise HTTPError(400, f"after is a cursor for sort={sort}.")
+    if type(contact_id) is not int or type(value) is not (int if order_by == "id" else str):
+        raise HTTPError(400, "after must be a cursor from a previous page.")
+    return Contact(contact_id, "", "", "", "")._replace(**{order_by: value})
+
+def _contact_fields(body, partial):
+    """The contact fields of a JSON request body; missing ones are None when `partial`."""
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "Body must be a JSON object.") from None
+    if not isinstance(data, dict):
+        raise HTTPError(400, "Body must be a JSON object.")
+    fields = []
+    for name in FIELDS:
+        value = data.get(name)
+        if value is None:
+            value = None if partial else ""
+        elif not isinstance(value, str):
+            raise HTTPError(400, f"{name} must be a string.")
+        fields.append(value)
+    return fields
+
+class ApiServer:
+    def __init__(self, service=None, workers=DEFAULT_WORKERS, cache_entries=CACHE_ENTRIES):
+        self.service = service or ContactService()
+        self.workers = workers
+        self.cache = ResponseCache(cache_entries)
+        # Part of every ETag, so tags from an earlier run never match this one
+        self._boot = os.urandom(4).hex()
+        # Request target -> (state, task) of list/search replies being built
+        self._building = {}
+        self._pool = None
+        self._writer = None
+        self._server = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Initialize the book and start listening; returns the bound (host, port)."""
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="api")
+        self._writer = WriteQueue()
+        await self._read(self.service.initialize)
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._writer is not None:
+            self._writer.close()
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def _state(self):
+        # The contacts version covers this server's writes once they commit;
+        # the data version also covers commits from other connections and processes
+        return database.get_contacts_version(), database.get_data_version()
+
+    async def _read(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+
+    async def _write(self, func, *args):
+        return await asyncio.wrap_future(self._writer.submit(func, *args))
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    writer.write(self._response(e.status, {"error": str(e)}, {}, keep_alive=False))
+                    break
+                if request is None:
+                    break
+                method, target, headers, body, keep_alive = request
+                status, payload, extra = await self._dispatch(method, target, headers, body)
+                writer.write(self._response(status, payload, extra, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None  # the client closed the connection between requests
+        except asyncio.LimitOverrunError:
+            raise HTTPError(400, "Request head too large.") from None
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise HTTPError(400, "Malformed request line.") from None
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        if "transfer-encoding" in headers:
+            raise HTTPError(400, "Send a Content-Length body; chunked bodies are not supported.")
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(400, "Malformed Content-Length.") from None
+        if length > MAX_BODY:
+            raise HTTPError(413, f"Bodies are limited to {MAX_BODY} bytes.")
+        body = await reader.readexactly(length) if length else b""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+        return method, target, headers, body, keep_alive
+
+    def _response(self, status, payload, headers, keep_alive):
+        body = b"" if payload is None else payload if isinstance(payload, bytes) else _json(payload)
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}"]
+        if status != 304:
+            lines.append("Content-Type: application/json")
+            lines.append(f"Content-Length: {len(body)}")
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    async def _dispatch(self, method, target, headers, body):
+        start = time.perf_counter()
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        route = "/" + "/".join(parts[:1]) + ("/<id>" if len(parts) > 1 else "")
+        try:
+            return await self._route(method, parts, url, headers, body)
+        except HTTPError as e:
+            return e.status, {"error": str(e)}, {}
+        except ValidationError as e:
+            return 400, {"error": "Invalid contact.", "errors": e.errors}, {}
+        except ContactNotFoundError as e:
+            return 404, {"error": str(e)}, {}
+        except (DuplicatePhoneError, BookFullError) as e:
+            return 409, {"error": str(e)}, {}
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+            return 500, {"error": "Internal error."}, {}
+        finally:
+            if instrumentation.enabled():
+                instrumentation.record(f"api.{method} {route}", time.perf_counter() - start)
+
+    async def _route(self, method, parts, url, headers, body):
+        query = parse_qs(url.query)
+        if parts == ["contacts"]:
+            if method == "GET":
+                return await self._cached(url, headers, self._list_page, query)
+            if method == "POST":
+                contact = await self._write(self.service.add, *_contact_fields(body, partial=False))
+                return 201, contact._asdict(), {"Location": f"/contacts/{contact.id}"}
+        elif len(parts) == 2 and parts[0] == "contacts":
+            try:
+                contact_id = int(parts[1])
+            except ValueError:
+                raise HTTPError(404, "No such contact.") from None
+            if method == "GET":
+                return 200, (await self._read(self.service.get, contact_id))._asdict(), {}
+            if method == "PATCH":
+                contact = await self._write(self.service.update, contact_id, *_contact_fields(body, partial=True))
+                return 200, contact._asdict(), {}
+            if method == "DELETE":
+                return 200, (await self._write(self.service.delete, contact_id))._asdict(), {}
+        elif parts == ["search"]:
+            if method == "GET":
+                return await self._cached(url, headers, self._search, query)
+        elif parts == ["health"]:
+            if method == "GET":
+                count = await self._read(self.service.count)
+                return 200, {"contacts": count, "version": database.get_contacts_version(), "pending_writes": self._writer.pending(),
+                             "cache": {"entries": len(self.cache), "hits": self.cache.hits, "misses": self.cache.misses}}, {}
+        else:
+            raise HTTPError(404, "No such endpoint.")
+        raise HTTPError(405, f"{method} is not allowed here.")
+
+    async def _cached(self, url, headers, build, query):
+        """Serve a GET from the response cache or via 304 when the data has not changed."""
+        state = self._state()
+        etag = f'"{self._boot}-{state[0]}-{state[1]}"'
+        extra = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in (tag.strip() for tag in headers.get("if-none-match", "").split(",")):
+            return 304, None, extra
+        key = url.path + "?" + url.query
+        body = self.cache.get(key, state)
+        if body is None:
+            # Concurrent requests for the same reply share one build
+            building = self._building.get(key)
+            if building is None or building[0] != state:
+                # Built and encoded on a worker thread, so big pages do not stall the loop
+                task = asyncio.ensure_future(self._read(build, query))
+                task.add_done_callback(partial(self._build_done, key))
+                building = self._building[key] = (state, task)
+            body = await asyncio.shield(building[1])
+            if self._state() == state:
+                self.cache.put(key, state, body)
+        return 200, body, extra
+
+    def _build_done(self, key, task):
+        if key in self._building and self._building[key][1] is task:
+            del self._building[key]
+
+    def _list_page(self, query):
+        limit = _int_param(query, "limit", 100, 1, MAX_PAGE)
+        order_by = _choice_param(query, "sort", SORT_COLUMNS, "id")
+        cursor = _param(query, "after")
+        after = _decode_cursor(cursor, order_by) if cursor else None
+        contacts = self.service.list(limit=limit, order_by=order_by, descending=_flag_param(query, "desc"), after=after)
+        return _json({
+            "contacts": [contact._asdict() for contact in contacts],
+            "next": _encode_cursor(contacts[-1], order_by) if len(contacts) == limit else None,
+        })
+
+    def _search(self, query):
+        text = _param(query, "q")
+        if not text:
+            raise HTTPError(400, "q is required.")
+        field = _choice_param(query, "field", SEARCH_FIELDS, "all fields")
+        limit = _int_param(query, "limit", 50, 1, MAX_PAGE)
+        contacts = self.service.search(field, text, limit=limit, fuzzy=_flag_param(query, "fuzzy"))
+        return _json({"contacts": [contact._asdict() for contact in contacts]})
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS, service=None):
+    """Run the API until interrupted with Ctrl+C."""
+    async def run():
+        server = ApiServer(service, workers)
+        bound_host, bound_port = await server.start(host, port)
+        print(f"Serving the address book API on http://{bound_host}:{bound_port}", flush=True)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,196 @@
+"""Benchmarks for the data layer with a reproducible synthetic contact generator.
+
+Each size gets a fresh database in a temporary directory, bulk-loaded with
+synthetic contacts, then every operation is timed call by call. Results
+(ops/sec, p50/p99/mean latency, peak traced memory) are printed as a table
+and can be written as JSON to compare releases.
+
+    python benchmark.py                              # 1k and 100k rows
+    python benchmark.py --sizes 1000 100000 1000000 --output bench.json
+    python benchmark.py --store sharded:4            # the same against 4 shard files
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import contact_io
+import database
+
+FIRST_NAMES = ["Juan", "Maria", "Jose", "Ana", "Pedro", "Rosa", "Miguel", "Carmen", "Antonio", "Luz",
+               "Ramon", "Elena", "Carlos", "Teresa", "Manuel", "Gloria", "Ricardo", "Isabel", "Andres", "Sofia"]
+LAST_NAMES = ["Santos", "Reyes", "Cruz", "Bautista", "Ocampo", "Garcia", "Mendoza", "Torres", "Castillo", "Flores",
+              "Villanueva", "Ramos", "Aquino", "Navarro", "Salazar", "Mercado", "Domingo", "Gutierrez", "Pascual", "Valdez"]
+STREETS = ["Rizal St", "Mabini Ave", "Bonifacio St", "Magsaysay Blvd", "Quezon Ave", "Luna St", "Burgos St", "Roxas Blvd"]
+CITIES = ["Quezon City", "Makati City", "Cebu City", "Davao City", "Pasig City", "Baguio City", "Iloilo City", "Santa Rosa City"]
+
+def synthetic_number(index):
+    # 7919 is coprime with 10**9, so this is a permutation: unique for index < 10**9
+    return f"09{index * 7919 % 10**9:09d}"
+
+def generate_contacts(count, seed=0, start=0):
+    """Yield (line_number, record) pairs ready for contact_io.import_contacts()."""
+    rng = random.Random(seed)
+    for index in range(start, start + count):
+        yield index + 1, {
+            "first": rng.choice(FIRST_NAMES),
+            "last": rng.choice(LAST_NAMES),
+            "address": f"{rng.randint(1, 999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}",
+            "number": synthetic_number(index),
+        }
+
+def _summary(size, name, latencies, peak_kb):
+    latencies.sort()
+    total = sum(latencies)
+    count = len(latencies)
+    return {
+        "size": size,
+        "operation": name,
+        "count": count,
+        "ops_per_sec": round(count / total, 1) if total else None,
+        "mean_ms": round(total / count * 1000, 4),
+        "p50_ms": round(latencies[count // 2] * 1000, 4),
+        "p99_ms": round(latencies[min(count - 1, int(count * 0.99))] * 1000, 4),
+        "peak_mem_kb": peak_kb,
+    }
+
+def _measure(calls, memory_samples):
+    """Time each call individually, then re-run a few under tracemalloc for peak memory."""
+    latencies = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+
+    peak_kb = None
+    if memory_samples:
+        tracemalloc.start()
+        for call in memory_samples:
+            call()
+        peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+    return latencies, peak_kb
+
+def store_spec(kind, size, directory):
+    """open_store() spec for a fresh `kind` store ("sqlite", "memory" or "sharded:N")."""
+    if kind == "memory":
+        return "memory:"
+    if kind.startswith("sharded:"):
+        return f"{kind}:{os.path.join(directory, f'bench_{size}')}"
+    return os.path.join(directory, f"bench_{size}.db")
+
+def bench_size(size, ops, seed, directory, store="sqlite"):
+    database.close_connections()
+    database.store_spec = store_spec(store, size, directory)
+    database.initialize_database()
+    rng = random.Random(seed)
+    results = []
+
+    def record(name, calls, memory_samples=()):
+        latencies, peak_kb = _measure(calls, memory_samples)
+        results.append(_summary(size, name, latencies, peak_kb))
+        print(_format(results[-1]), flush=True)
+
+    # Bulk load (one call; also what makes the larger sizes feasible)
+    record("bulk_import", [lambda: contact_io.import_contacts(generate_contacts(size, seed=seed))])
+
+    new_numbers = [synthetic_number(size + i) for i in range(ops)]
+    added_ids = []
+    calls = [lambda n=n: added_ids.append(database.add_contact("Bench", "Mark", "1 Test St, Test City", n)) for n in new_numbers]
+    record("add_contact", calls)
+
+    probes = [synthetic_number(rng.randrange(size * 2)) for _ in range(ops)]
+    record("phone_exists", [lambda p=p: database.phone_exists(p) for p in probes])
+
+    # Real ids and numbers: stores other than a single file do not number contacts 1..size
+    known = [(contact.id, contact.number) for contact in database.iter_contacts()]
+    targets = [rng.choice(known) for _ in range(ops)]
+    record("update_contact", [lambda i=i, n=n: database.update_contact(i, "Updated", "Name", "2 Test St, Test City", n) for i, n in targets])
+
+    queries = [(field, value) for field, value in (
+        ("first name", rng.choice(FIRST_NAMES)[1:4]),
+        ("last name", rng.choice(LAST_NAMES)[:5]),
+        ("address", rng.choice(CITIES)[:6]),
+        ("contact number", synthetic_number(rng.randrange(size))[3:8]),
+    ) for _ in range(max(1, ops // 4))]
+    record("search_contacts", [lambda f=f, q=q: database.search_contacts(f, q, limit=200) for f, q in queries],
+           [lambda f=f, q=q: database.search_contacts(f, q, limit=200) for f, q in queries[:20]])
+
+    # Misspelled names: drop one letter from a known name
+    misspelled = []
+    for _ in range(max(1, ops // 4)):
+        name = rng.choice(FIRST_NAMES + LAST_NAMES)
+        cut = rng.randrange(1, len(name))
+        misspelled.append(name[:cut] + name[cut + 1:])
+    record("fuzzy_search_contacts", [lambda q=q: database.fuzzy_search_contacts("all fields", q, limit=20) for q in misspelled],
+           [lambda q=q: database.fuzzy_search_contacts("all fields", q, limit=20) for q in misspelled[:20]])
+
+    # Walk forward through the book sorted by last name, one timed call per page
+    cursor = {"after": None}
+    def next_page():
+        page = database.get_contacts_page(limit=100, after=cursor["after"], order_by="last")
+        cursor["after"] = page[-1] if page else None
+    record("get_contacts_page", [next_page] * max(1, min(ops, size // 100)))
+
+    # Full loads are expensive at large sizes, so only a handful of repetitions
+    repeats = 3 if size >= 100000 else 10
+    def cold_load():
+        database.invalidate_cache()
+        database.get_all_contacts()
+    record("get_all_contacts_cold", [cold_load] * repeats, [cold_load])
+    record("get_all_contacts_warm", [database.get_all_contacts] * ops)
+
+    record("delete_contact", [lambda i=i: database.delete_contact(i) for i in added_ids])
+
+    database.invalidate_cache()
+    database.close_connections()
+    return results
+
+def _format(row):
+    peak = "" if row["peak_mem_kb"] is None else f"{row['peak_mem_kb']:>10.1f} KB"
+    return (f"{row['size']:>9} {row['operation']:<24} {row['count']:>7} "
+            f"{row['ops_per_sec'] or 0:>12.1f}/s  p50 {row['p50_ms']:>9.3f} ms  p99 {row['p99_ms']:>9.3f} ms {peak}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the address book data layer")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000], help="rows to load per run (e.g. 1000 100000 1000000)")
+    parser.add_argument("--ops", type=int, default=1000, help="calls per timed operation")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--store", default="sqlite", help="store to benchmark: sqlite, memory or sharded:N (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "ops": args.ops,
+        "seed": args.seed,
+        "store": args.store,
+    }
+    results = []
+    original_spec = database.store_spec
+    with tempfile.TemporaryDirectory(prefix="addressbook-bench-") as directory:
+        try:
+            for size in args.sizes:
+                results.extend(bench_size(size, args.ops, args.seed, directory, args.store))
+        finally:
+            database.close_connections()
+            database.store_spec = original_spec
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump({"meta": meta, "results": results}, fp, indent=2)
+        print(f"Wrote {len(results)} results to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Command-line front end for the address book.
+
+Runs through ContactService without importing tkinter; only the `gui`
+command loads the Tk application.
+
+    python cli.py add Juan "Dela Cruz" "55 Magsaysay Ave, Cebu City" 09189876543
+    python cli.py search --field "last name" cruz
+    python cli.py list --sort last --limit 20
+    python cli.py import contacts.csv
+    python cli.py export backup.vcf
+    python cli.py serve --port 8080
+"""
+
+import argparse
+import json
+import sys
+
+import database
+import instrumentation
+from database import DuplicatePhoneError, SEARCH_FIELDS, SORT_COLUMNS
+from service import ContactService, ValidationError, BookFullError, ContactNotFoundError
+
+def _print_contacts(contacts, as_json):
+    for c in contacts:
+        if as_json:
+            print(json.dumps(c._asdict()))
+        else:
+            print(f"{c.id}\t{c.first}\t{c.last}\t{c.address}\t{c.number}")
+
+def cmd_add(service, args):
+    _print_contacts([service.add(args.first, args.last, args.address, args.number)], args.json)
+
+def cmd_update(service, args):
+    # Several ids are saved together in one transaction
+    service.update_many([(contact_id, args.first, args.last, args.address, args.number) for contact_id in args.ids])
+    _print_contacts([service.get(contact_id) for contact_id in args.ids], args.json)
+
+def cmd_delete(service, args):
+    count = service.delete_many(args.ids)
+    print(f"Deleted {count} contact(s).")
+
+def cmd_search(service, args):
+    _print_contacts(service.search(args.field, args.query, limit=args.limit, fuzzy=args.fuzzy), args.json)
+
+def cmd_list(service, args):
+    if args.all:
+        contacts = service.iter_all(order_by=args.sort, descending=args.desc)
+    else:
+        contacts = service.list(limit=args.limit, after_id=args.after, order_by=args.sort, descending=args.desc)
+    _print_contacts(contacts, args.json)
+
+def cmd_import(service, args):
+    report = service.import_file(args.path, fmt=args.format, batch_size=args.batch_size)
+    for line_number, message in report.errors:
+        print(f"line {line_number}: {message}", file=sys.stderr)
+    print(f"Imported {report.imported}, skipped {report.duplicates} duplicate(s), {len(report.errors)} invalid.")
+
+def cmd_export(service, args):
+    count = service.export_file(args.path, fmt=args.format)
+    print(f"Exported {count} contact(s) to {args.path}.")
+
+def cmd_gui(service, args):
+    from main import AddressBook  # tkinter is only needed here
+    AddressBook(max_entries=args.max_entries).run(measure_startup=args.startup_time)
+
+def cmd_serve(service, args):
+    from api_server import serve  # asyncio is only needed here
+    serve(host=args.host, port=args.port, workers=args.workers, service=service)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="addressbook", description="Group 4 Address Book")
+    location = parser.add_mutually_exclusive_group()
+    location.add_argument("--db", help=f"database file (default: {database.database_name})")
+    location.add_argument("--store", help=f"contact store: a database file, memory: or sharded:N:DIR (default: ${database.STORE_ENV} or --db)")
+    parser.add_argument("--json", action="store_true", help="print contacts as JSON lines")
+    parser.add_argument("--stats", action="store_true", help="print per-operation and per-statement timing to stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("add", help="add a contact")
+    p.add_argument("first")
+    p.add_argument("last")
+    p.add_argument("address")
+    p.add_argument("number")
+    p.set_defaults(handler=cmd_add)
+
+    p = commands.add_parser("update", help="change fields of one or more contacts")
+    p.add_argument("ids", type=int, nargs="+")
+    p.add_argument("--first")
+    p.add_argument("--last")
+    p.add_argument("--address")
+    p.add_argument("--number")
+    p.set_defaults(handler=cmd_update)
+
+    p = commands.add_parser("delete", help="delete contacts by id")
+    p.add_argument("ids", type=int, nargs="+")
+    p.set_defaults(handler=cmd_delete)
+
+    p = commands.add_parser("search", help="search contacts")
+    p.add_argument("query")
+    p.add_argument("--field", choices=list(SEARCH_FIELDS), default="all fields")
+    p.add_argument("--limit", type=int, default=50, help="maximum results (the top-k for --fuzzy)")
+    p.add_argument("--fuzzy", action="store_true", help="also match misspellings and names that sound alike, best first")
+    p.set_defaults(handler=cmd_search)
+
+    p = commands.add_parser("list", help="list contacts a page at a time")
+    p.add_argument("--limit", type=int, default=100)
+    p.add_argument("--after", type=int, help="continue after this contact id")
+    p.add_argument("--sort", choices=list(SORT_COLUMNS), default="id")
+    p.add_argument("--desc", action="store_true")
+    p.add_argument("--all", action="store_true", help="stream every contact instead of one page")
+    p.set_defaults(handler=cmd_list)
+
+    p = commands.add_parser("import", help="import a CSV, JSONL or vCard file")
+    p.add_argument("path")
+    p.add_argument("--format", choices=["csv", "jsonl", "vcard"])
+    p.add_argument("--batch-size", type=int, default=1000)
+    p.set_defaults(handler=cmd_import)
+
+    p = commands.add_parser("export", help="export every contact to CSV, JSONL or vCard")
+    p.add_argument("path")
+    p.add_argument("--format", choices=["csv", "jsonl", "vcard"])
+    p.set_defaults(handler=cmd_export)
+
+    p = commands.add_parser("gui", help="open the Tkinter application")
+    p.add_argument("--max-entries", type=int)
+    p.add_argument("--startup-time", action="store_true", help="print time to first paint and to ready, then exit")
+    p.set_defaults(handler=cmd_gui)
+
+    p = commands.add_parser("serve", help="run the local HTTP/JSON API")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080, help="0 picks a free port")
+    p.add_argument("--workers", type=int, default=8, help="database worker threads, one connection each")
+    p.set_defaults(handler=cmd_serve)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.db:
+        database.database_name = args.db
+        database.store_spec = None
+    if args.store:
+        database.store_spec = args.store
+    if args.stats:
+        instrumentation.enable()
+    service = ContactService()
+    try:
+        service.initialize()
+        args.handler(service, args)
+    except (ValidationError, BookFullError, ContactNotFoundError, DuplicatePhoneError, ValueError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.stats:
+            instrumentation.dump()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""Streaming import/export of contacts as CSV, JSON Lines or vCard.
+
+Readers are generators yielding (line_number, record) pairs, where a record is
+a dict with "first", "last", "address" and "number" keys (or None when the
+input could not be parsed). import_contacts() validates them with the same
+rules as the GUI and inserts them with executemany() in batches inside one
+transaction; duplicate numbers are skipped by the unique phone index.
+Writers stream rows straight from a cursor, so memory stays constant.
+"""
+
+import csv
+import json
+from itertools import islice
+
+import instrumentation
+import validation
+from database import bulk_insert, iter_contacts
+
+FIELDS = ("first", "last", "address", "number")
+
+# Accepted spellings of each field in CSV headers and JSON keys
+FIELD_ALIASES = {
+    "first": "first", "first_name": "first", "firstname": "first",
+    "last": "last", "last_name": "last", "lastname": "last",
+    "address": "address",
+    "number": "number", "phone": "number", "phone_number": "number", "contact_number": "number",
+}
+
+DEFAULT_BATCH_SIZE = 1000
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.duplicates = 0
+        self.errors = []  # (line_number, message) pairs
+
+    def __repr__(self):
+        return f"ImportReport(imported={self.imported}, duplicates={self.duplicates}, errors={len(self.errors)})"
+
+def _normalize_keys(raw):
+    record = {}
+    for key, value in raw.items():
+        field = FIELD_ALIASES.get(str(key).strip().lower().replace(" ", "_"))
+        if field is not None:
+            record[field] = "" if value is None else str(value)
+    return record
+
+def read_csv(fp):
+    reader = csv.DictReader(fp)
+    for row in reader:
+        yield reader.line_num, _normalize_keys(row)
+
+def read_jsonl(fp):
+    for line_number, line in enumerate(fp, 1):
+        if not line.strip():
+            continue
+        try:
+            raw = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, _normalize_keys(raw) if isinstance(raw, dict) else None
+
+def _split_escaped(value, separator):
+    parts, current, escaped = [], [], False
+    for ch in value:
+        if escaped:
+            current.append("\n" if ch in "nN" else ch)
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == separator:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    parts.append("".join(current))
+    return parts
+
+def _unfolded_lines(fp):
+    # vCard folds long lines by starting the continuation with a space or tab
+    pending = None
+    for line_number, line in enumerate(fp, 1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending = (pending[0], pending[1] + line[1:])
+            continue
+        if pending is not None:
+            yield pending
+        pending = (line_number, line)
+    if pending is not None:
+        yield pending
+
+def read_vcard(fp):
+    card, start = None, 0
+    for line_number, line in _unfolded_lines(fp):
+        name, _, value = line.partition(":")
+        prop = name.split(";")[0].strip().upper()
+        if prop == "BEGIN" and value.strip().upper() == "VCARD":
+            card, start = {}, line_number
+        elif card is None:
+            continue
+        elif prop == "END":
+            yield start, card
+            card = None
+        elif prop == "N":
+            parts = _split_escaped(value, ";") + ["", ""]
+            card["last"], card["first"] = parts[0], parts[1]
+        elif prop == "FN" and "first" not in card:
+            first, _, last = _split_escaped(value, ";")[0].partition(" ")
+            card.setdefault("first", first)
+            card.setdefault("last", last)
+        elif prop == "ADR" and "address" not in card:
+            card["address"] = ", ".join(part for part in _split_escaped(value, ";") if part.strip())
+        elif prop == "TEL" and "number" not in card:
+            card["number"] = value
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "vcard": read_vcard}
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def import_contacts(records, batch_size=DEFAULT_BATCH_SIZE):
+    """Validate and insert (line_number, record) pairs; returns an ImportReport.
+
+    All batches run inside a single transaction, so a failure part-way
+    through leaves the book unchanged.
+    """
+    report = ImportReport()
+    with instrumentation.timed("io.import_contacts") as span, bulk_insert() as insert:
+        for batch in _batches(records, batch_size):
+            checked = []
+            for line_number, record in batch:
+                if record is None:
+                    report.errors.append((line_number, "Malformed record."))
+                else:
+                    checked.append((line_number, record.get("first", ""), record.get("last", ""), record.get("address", ""), record.get("number", "")))
+            rows, errors = validation.validate_batch(checked)
+            report.errors.extend((line_number, " ".join(messages)) for line_number, messages in errors)
+            if not rows:
+                continue
+            inserted = insert(rows)
+            report.imported += inserted
+            report.duplicates += len(rows) - inserted
+        span.rows = report.imported
+    return report
+
+def import_file(path, fmt=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Import a file, picking the reader from `fmt` or the file extension."""
+    fmt = fmt or format_for_path(path)
+    # utf-8-sig drops the byte order mark Excel writes at the start of a CSV
+    with open(path, newline="", encoding="utf-8-sig") as fp:
+        return import_contacts(READERS[fmt](fp), batch_size=batch_size)
+
+def _iter_rows(batch_size):
+    for contact in iter_contacts(batch_size=batch_size):
+        yield contact[1:]
+
+def _vcard_escape(value):
+    return value.replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;").replace("\n", "\\n")
+
+def write_csv(fp, rows):
+    writer = csv.writer(fp)
+    writer.writerow(FIELDS)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+def write_jsonl(fp, rows):
+    count = 0
+    for row in rows:
+        fp.write(json.dumps(dict(zip(FIELDS, row))) + "\n")
+        count += 1
+    return count
+
+def write_vcard(fp, rows):
+    count = 0
+    for first, last, address, number in rows:
+        fp.write("BEGIN:VCARD\r\nVERSION:3.0\r\n")
+        fp.write(f"N:{_vcard_escape(last)};{_vcard_escape(first)};;;\r\n")
+        fp.write(f"FN:{_vcard_escape(first)} {_vcard_escape(last)}\r\n")
+        fp.write(f"ADR:;;{_vcard_escape(address)};;;;\r\n")
+        fp.write(f"TEL;TYPE=CELL:{number}\r\n")
+        fp.write("END:VCARD\r\n")
+        count += 1
+    return count
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "vcard": write_vcard}
+
+@instrumentation.instrumented("io.export_contacts", rows=int)
+def export_contacts(fp, fmt, batch_size=DEFAULT_BATCH_SIZE):
+    """Stream every contact to `fp` in the given format; returns the number written."""
+    return WRITERS[fmt](fp, _iter_rows(batch_size))
+
+def export_file(path, fmt=None, batch_size=DEFAULT_BATCH_SIZE):
+    fmt = fmt or format_for_path(path)
+    with open(path, "w", newline="", encoding="utf-8") as fp:
+        return export_contacts(fp, fmt, batch_size=batch_size)
+
+def format_for_path(path):
+    extension = path.rsplit(".", 1)[-1].lower()
+    formats = {"csv": "csv", "jsonl": "jsonl", "ndjson": "jsonl", "vcf": "vcard", "vcard": "vcard"}
+    if extension not in formats:
+        raise ValueError(f"Cannot tell the format of {path!r}; use .csv, .jsonl or .vcf")
+    return formats[extension]
@@ -1,90 +1,1334 @@
 import sqlite3
 import os
+import re
+import atexit
+import itertools
+import string
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, ExitStack
+from functools import partial
+from heapq import merge, nlargest
+from operator import attrgetter
+from typing import NamedTuple
+
+import fuzzy
+import instrumentation
+from instrumentation import instrumented
 
 database_name = "app_database.db"
 
-def get_connection():
-    return sqlite3.connect(database_name)
+# Backend behind the module-level functions, as an open_store() spec; when
+# unset they use the SQLite file database_name
+STORE_ENV = "ADDRESSBOOK_STORE"
+store_spec = os.environ.get(STORE_ENV) or None
 
-def initialize_database():
-    conn = get_connection()
-    cursor = conn.cursor()
+# Tuning applied to every connection when it is opened
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -16000),      # negative value is KiB, so ~16 MB of page cache
+    ("mmap_size", 268435456),    # 256 MB memory-mapped reads
+    ("temp_store", "MEMORY"),
+)
+STATEMENT_CACHE_SIZE = 256
 
-    cursor.execute('''
-                   CREATE TABLE IF NOT EXISTS contacts(
-                   id INTEGER PRIMARY KEY AUTOINCREMENT,
-                   first_name TEXT NOT NULL,
-                   last_name TEXT NOT NULL,
-                   address TEXT NOT NULL,
-                   phone_number TEXT NOT NULL
-                   )
-                   ''')
-    
-    conn.commit()
-    conn.close()
+class Contact(NamedTuple):
+    """One stored contact; values are already in canonical (normalized) form."""
+    id: int
+    first: str
+    last: str
+    address: str
+    number: str
 
-def add_contact(first_name, last_name, address, phone_number):
-    conn = get_connection()
-    cursor = conn.cursor()
+CONTACT_COLUMNS = 'id, first_name, last_name, address, phone_number'
 
-    cursor.execute('''
-                   INSERT INTO contacts (first_name, last_name, address, phone_number)
-                   VALUES (?, ?, ?, ?)
-                   ''', (first_name.title(), last_name.title(), address.title(), phone_number))
-    
-    conn.commit()
-    conn.close()
+def _contact_factory(cursor, row):
+    return Contact._make(row)
 
-def phone_exists(phone_number, exclude_id=None):
-    conn = get_connection()
+def _query_contacts(conn, sql, params=()):
+    """Execute a SELECT of CONTACT_COLUMNS whose rows come back as Contact records."""
     cursor = conn.cursor()
+    cursor.row_factory = _contact_factory
+    return cursor.execute(sql, params)
 
-    if exclude_id is None:
-        cursor.execute('SELECT 1 FROM contacts WHERE phone_number = ? LIMIT 1', (phone_number,))
-    else:
-        cursor.execute('SELECT 1 FROM contacts WHERE phone_number = ? AND id != ? LIMIT 1', (phone_number, exclude_id))
-    exists = cursor.fetchone() is not None
-    conn.close()
-    return exists
+def _normalized(first_name, last_name, address, phone_number):
+    # Done once on the way in, so reads and renders never re-normalize
+    return first_name.strip().title(), last_name.strip().title(), address.strip().title(), phone_number.strip()
 
-def get_all_contacts():
-    conn = get_connection()
-    cursor = conn.cursor()
+def _key_rows(rows):
+    # (key, field, contact_id) rows of contact_keys for (contact_id, first_name, last_name) rows
+    for contact_id, first_name, last_name in rows:
+        for key in fuzzy.phonetic_keys(first_name):
+            yield key, "first", contact_id
+        for key in fuzzy.phonetic_keys(last_name):
+            yield key, "last", contact_id
+
+def _add_keys(conn, rows):
+    """Index the phonetic keys of newly inserted (contact_id, first_name, last_name) rows."""
+    conn.executemany('INSERT OR IGNORE INTO contact_keys (key, field, contact_id) VALUES (?, ?, ?)', _key_rows(rows))
+
+def _replace_keys(conn, rows):
+    """Re-index the phonetic keys of updated rows; ids with no contact get none."""
+    conn.executemany('DELETE FROM contact_keys WHERE contact_id = ?', [(row[0],) for row in rows])
+    conn.executemany('''
+                     INSERT OR IGNORE INTO contact_keys (key, field, contact_id)
+                     SELECT ?, ?, id FROM contacts WHERE id = ?
+                     ''', _key_rows(rows))
+
+class DuplicatePhoneError(Exception):
+    """Raised when a write would give two contacts the same phone number."""
+
+    def __init__(self, phone_number):
+        super().__init__(f"Contact number {phone_number} already exists.")
+        self.phone_number = phone_number
 
-    cursor.execute('SELECT id, first_name, last_name, address, phone_number FROM contacts')
-    rows = cursor.fetchall()
-    conn.close()
+def _migration_1(conn):
+    conn.execute('''
+                 CREATE TABLE IF NOT EXISTS contacts(
+                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                 first_name TEXT NOT NULL,
+                 last_name TEXT NOT NULL,
+                 address TEXT NOT NULL,
+                 phone_number TEXT NOT NULL
+                 )
+                 ''')
 
-    # Convert to list of dictionaries for compatibility
-    contacts = []
+def _migration_2(conn):
+    # Older books only checked duplicates in the UI; keep the oldest row per number
+    # and move the others to removed_duplicates, next to the id that was kept
+    conn.execute('''
+                 CREATE TABLE IF NOT EXISTS removed_duplicates(
+                 id INTEGER PRIMARY KEY,
+                 first_name TEXT NOT NULL,
+                 last_name TEXT NOT NULL,
+                 address TEXT NOT NULL,
+                 phone_number TEXT NOT NULL,
+                 kept_id INTEGER NOT NULL
+                 )
+                 ''')
+    conn.execute('''
+                 INSERT INTO removed_duplicates (id, first_name, last_name, address, phone_number, kept_id)
+                 SELECT c.id, c.first_name, c.last_name, c.address, c.phone_number, kept.id
+                 FROM contacts c
+                 JOIN (SELECT MIN(id) AS id, phone_number FROM contacts GROUP BY phone_number) kept
+                 ON kept.phone_number = c.phone_number AND kept.id != c.id
+                 ''')
+    conn.execute('''
+                 DELETE FROM contacts
+                 WHERE id NOT IN (SELECT MIN(id) FROM contacts GROUP BY phone_number)
+                 ''')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_contacts_phone ON contacts(phone_number)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_contacts_first ON contacts(first_name COLLATE NOCASE)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_contacts_last ON contacts(last_name COLLATE NOCASE)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_contacts_address ON contacts(address COLLATE NOCASE)')
+
+_FTS_INSERT_TRIGGER = '''
+                      CREATE TRIGGER IF NOT EXISTS contacts_fts_insert AFTER INSERT ON contacts BEGIN
+                          INSERT INTO contacts_fts(rowid, first_name, last_name, address, phone_number)
+                          VALUES (new.id, new.first_name, new.last_name, new.address, new.phone_number);
+                      END
+                      '''
+
+def _migration_3(conn):
+    # Trigram full-text index kept in sync with contacts by triggers
+    try:
+        conn.execute('''
+                     CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+                     first_name, last_name, address, phone_number,
+                     content='contacts', content_rowid='id', tokenize='trigram'
+                     )
+                     ''')
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5/trigram; search_contacts() falls back to LIKE
+        return
+    conn.execute(_FTS_INSERT_TRIGGER)
+    conn.execute('''
+                 CREATE TRIGGER IF NOT EXISTS contacts_fts_delete AFTER DELETE ON contacts BEGIN
+                     INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, address, phone_number)
+                     VALUES ('delete', old.id, old.first_name, old.last_name, old.address, old.phone_number);
+                 END
+                 ''')
+    conn.execute('''
+                 CREATE TRIGGER IF NOT EXISTS contacts_fts_update AFTER UPDATE ON contacts BEGIN
+                     INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, address, phone_number)
+                     VALUES ('delete', old.id, old.first_name, old.last_name, old.address, old.phone_number);
+                     INSERT INTO contacts_fts(rowid, first_name, last_name, address, phone_number)
+                     VALUES (new.id, new.first_name, new.last_name, new.address, new.phone_number);
+                 END
+                 ''')
+    conn.execute("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')")
+
+def _migration_4(conn):
+    # Reads used to title-case on every load; store the canonical form instead
+    rows = conn.execute(f'SELECT {CONTACT_COLUMNS} FROM contacts').fetchall()
+    changed = []
+    for contact_id, *fields in rows:
+        normalized = _normalized(*fields)
+        if list(normalized) != fields:
+            changed.append(normalized + (contact_id,))
+    conn.executemany('''
+                     UPDATE OR IGNORE contacts
+                     SET first_name = ?, last_name = ?, address = ?, phone_number = ?
+                     WHERE id = ?
+                     ''', changed)
+
+def _migration_5(conn):
+    # One Soundex key per word of each name (plus the whole name, see
+    # fuzzy.phonetic_keys()), so "jhon dela" can match "Juan Paolo Dela Cruz"
+    conn.execute('''
+                 CREATE TABLE IF NOT EXISTS contact_keys(
+                 key TEXT NOT NULL,
+                 field TEXT NOT NULL,
+                 contact_id INTEGER NOT NULL,
+                 PRIMARY KEY (key, field, contact_id)
+                 ) WITHOUT ROWID
+                 ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_contact_keys_contact ON contact_keys(contact_id)')
+    conn.execute('''
+                 CREATE TRIGGER IF NOT EXISTS contact_keys_delete AFTER DELETE ON contacts BEGIN
+                     DELETE FROM contact_keys WHERE contact_id = old.id;
+                 END
+                 ''')
+    _add_keys(conn, conn.execute('SELECT id, first_name, last_name FROM contacts').fetchall())
+    if _has_fts(conn):
+        # Only changes to the indexed columns need to touch the search index
+        conn.execute('DROP TRIGGER IF EXISTS contacts_fts_update')
+        conn.execute('''
+                     CREATE TRIGGER contacts_fts_update AFTER UPDATE OF first_name, last_name, address, phone_number ON contacts BEGIN
+                         INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, address, phone_number)
+                         VALUES ('delete', old.id, old.first_name, old.last_name, old.address, old.phone_number);
+                         INSERT INTO contacts_fts(rowid, first_name, last_name, address, phone_number)
+                         VALUES (new.id, new.first_name, new.last_name, new.address, new.phone_number);
+                     END
+                     ''')
+
+# Schema upgrades, applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    _migration_1,
+    _migration_2,
+    _migration_3,
+    _migration_4,
+    _migration_5,
+]
+
+def _is_phone_conflict(error):
+    return "phone_number" in str(error)
+
+def _conflicting_number(conn, rows):
+    # executemany does not say which row failed; find a number that is repeated
+    # within the batch or already used by a contact outside it
+    seen, ids = set(), {row[-1] for row in rows}
+    for row in rows:
+        number = row[3]
+        if number in seen:
+            return number
+        seen.add(number)
     for row in rows:
-        contacts.append({
-            "id": row[0],
-            "first": (row[1] or "").title(),
-            "last": (row[2] or "").title(),
-            "address": (row[3] or "").title(),
-            "number": row[4]
-        })
-    return contacts
+        owner = conn.execute('SELECT id FROM contacts WHERE phone_number = ?', (row[3],)).fetchone()
+        if owner is not None and owner[0] not in ids:
+            return row[3]
+    return rows[0][3]
 
-def update_contact(contact_id, first_name, last_name, address, phone_number):
-    conn = get_connection()
-    cursor = conn.cursor()
+@contextmanager
+def deferred_search_index(conn):
+    """Index rows inserted inside this block in one pass instead of per row.
+
+    Used by bulk loads: the FTS insert trigger is dropped for the duration of
+    the (already open or newly begun) transaction, the new rows are added to
+    contacts_fts with a single INSERT ... SELECT and the trigger is restored.
+    Everything commits or rolls back together.
+    """
+    if not _has_fts(conn):
+        yield
+        return
+    if not conn.in_transaction:
+        conn.execute('BEGIN')
+    start_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM contacts').fetchone()[0]
+    conn.execute('DROP TRIGGER IF EXISTS contacts_fts_insert')
+    yield
+    conn.execute('''
+                 INSERT INTO contacts_fts(rowid, first_name, last_name, address, phone_number)
+                 SELECT id, first_name, last_name, address, phone_number FROM contacts WHERE id > ?
+                 ''', (start_id,))
+    conn.execute(_FTS_INSERT_TRIGGER)
+
+# Search modes offered by the GUI, mapped to their columns (None searches every column)
+SEARCH_FIELDS = {
+    "all fields": None,
+    "first name": "first_name",
+    "last name": "last_name",
+    "address": "address",
+    "contact number": "phone_number",
+}
+
+def _has_fts(conn):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contacts_fts'").fetchone()
+    return row is not None
+
+# What each search mode compares against in fuzzy_search_contacts(): the Contact
+# fields scored by trigram similarity, and the fields whose stored phonetic
+# keys (contact_keys.field) are looked up
+_FUZZY_TARGETS = {
+    "all fields": (("first", "last", "address"), ("first", "last")),
+    "first name": (("first",), ("first",)),
+    "last name": (("last",), ("last",)),
+    "address": (("address",), ()),
+}
+
+# Columns the contact list can be sorted by; text sorts case-insensitively so the NOCASE indexes apply
+SORT_COLUMNS = {
+    "id": "id",
+    "first": "first_name COLLATE NOCASE",
+    "last": "last_name COLLATE NOCASE",
+    "address": "address COLLATE NOCASE",
+    "number": "phone_number",
+}
+
+def insert_contact_rows(conn, rows):
+    """Bulk-insert already normalized (first, last, address, number) rows on `conn`.
+
+    Rows whose number is already taken are skipped; returns how many were
+    inserted. The caller owns the transaction and must invalidate the cache.
+    """
+    start_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM contacts').fetchone()[0]
+    cursor = conn.executemany('''
+                              INSERT OR IGNORE INTO contacts (first_name, last_name, address, phone_number)
+                              VALUES (?, ?, ?, ?)
+                              ''', rows)
+    if cursor.rowcount:
+        _add_keys(conn, conn.execute('SELECT id, first_name, last_name FROM contacts WHERE id > ?', (start_id,)).fetchall())
+    return cursor.rowcount
+
+_NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def _sort_key(order_by):
+    # The Python side of SORT_COLUMNS, for merging rows that SQLite sorted (NOCASE only folds ASCII)
+    if order_by == "id":
+        return attrgetter("id")
+    if order_by == "number":
+        return attrgetter("number", "id")
+    return lambda contact: (getattr(contact, order_by).translate(_NOCASE), contact.id)
+
+class ContactStore(ABC):
+    """Where an address book's contacts live.
+
+    The module-level functions below call these methods on get_store().
+    Backends: SQLiteStore (one file), MemoryStore (in-memory SQLite) and
+    ShardedStore (several files queried in parallel). Reads return Contact
+    records; writes raise DuplicatePhoneError when a number is taken. Every
+    method is abstract, so a backend missing one fails when it is built.
+    """
+
+    @abstractmethod
+    def initialize(self):
+        """Create the schema or bring it up to date."""
+
+    @abstractmethod
+    def get_schema_version(self):
+        ...
+
+    @abstractmethod
+    def close(self):
+        """Close pooled connections; they reopen lazily on next use."""
+
+    @abstractmethod
+    def thread_connections(self):
+        """Connections this thread's queries run on, for interrupt() from another thread."""
+
+    @abstractmethod
+    def group_commit(self):
+        """Context manager committing every write this thread makes inside it together."""
+
+    @abstractmethod
+    def bulk_insert(self):
+        """Context manager yielding insert(rows) for normalized (first, last, address, number) rows.
+
+        insert() skips rows whose number is taken and returns how many it
+        added; nothing is committed until the block exits.
+        """
+
+    @abstractmethod
+    def invalidate_cache(self):
+        """Drop cached contacts so the next read reloads them (e.g. after another process wrote)."""
+
+    @abstractmethod
+    def get_contacts_version(self):
+        """Counter that changes whenever the contact set changes."""
+
+    @abstractmethod
+    def get_data_version(self):
+        """Value that changes when any connection, in this process or another, commits to the book.
+
+        get_contacts_version() only sees writes made through this store object.
+        """
+
+    @abstractmethod
+    def add_contact(self, first_name, last_name, address, phone_number):
+        ...
+
+    @abstractmethod
+    def phone_exists(self, phone_number, exclude_id=None):
+        ...
+
+    @abstractmethod
+    def get_contact(self, contact_id):
+        ...
+
+    @abstractmethod
+    def get_all_contacts(self):
+        ...
+
+    @abstractmethod
+    def count_contacts(self):
+        ...
+
+    @abstractmethod
+    def has_contacts(self):
+        ...
+
+    @abstractmethod
+    def update_contact(self, contact_id, first_name, last_name, address, phone_number):
+        ...
+
+    @abstractmethod
+    def update_contacts(self, rows):
+        ...
+
+    @abstractmethod
+    def delete_contact(self, contact_id):
+        ...
+
+    @abstractmethod
+    def delete_contacts(self, contact_ids):
+        ...
+
+    @abstractmethod
+    def search_contacts(self, field, query, limit=None):
+        ...
+
+    @abstractmethod
+    def fuzzy_search_contacts(self, field, query, limit=20, min_score=0.3):
+        ...
+
+    @abstractmethod
+    def get_contacts_page(self, limit=100, after=None, before=None, order_by="id", descending=False):
+        ...
+
+    @abstractmethod
+    def iter_contacts(self, batch_size=1000, where=None, params=(), order_by="id", descending=False):
+        ...
+
+class SQLiteStore(ContactStore):
+    """Contacts in one SQLite file, with a pooled connection per thread and a write-through cache."""
+
+    def __init__(self, path, uri=False):
+        self.path = path
+        self.uri = uri
+        # One long-lived connection per thread, reused by every method below
+        self._local = threading.local()
+        self._open_connections = []
+        self._connections_lock = threading.Lock()
+        self._generation = 0
+        # Write-through contact cache: id -> Contact in id order, loaded once and
+        # then patched from the results of each insert/update/delete. The version
+        # counter goes up on every write so callers can skip work when nothing changed.
+        self._cache = None
+        self._cache_snapshot = None
+        self._cache_lock = threading.RLock()
+        self._version = 0
+        # Connection that only ever runs PRAGMA data_version, see get_data_version()
+        self._monitor = None
+        self._monitor_lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r})"
+
+    @instrumented("db.open_connection")
+    def _open_connection(self):
+        conn = sqlite3.connect(self.path, uri=self.uri, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+        instrumentation.attach(conn)
+        for name, value in PRAGMAS:
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def get_connection(self):
+        """Return this thread's pooled connection, opening it on first use."""
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is None or local.generation != self._generation:
+            conn = self._open_connection()
+            with self._connections_lock:
+                self._open_connections.append(conn)
+                local.generation = self._generation
+            local.conn = conn
+        return conn
+
+    def thread_connections(self):
+        return [self.get_connection()]
+
+    @contextmanager
+    def connection(self):
+        """Yield the pooled connection inside a transaction (commit on success, rollback on error).
+
+        Inside group_commit() the block becomes a savepoint of the group's
+        transaction instead, so a failure only undoes that block.
+        """
+        conn = self.get_connection()
+        if getattr(self._local, "grouped", False):
+            conn.execute('SAVEPOINT unit')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK TO unit')
+                conn.execute('RELEASE unit')
+                raise
+            conn.execute('RELEASE unit')
+            return
+        with conn:
+            yield conn
+
+    @contextmanager
+    def group_commit(self):
+        """Run every write made on this thread inside the block as one transaction.
+
+        Each add/update/delete still succeeds or fails on its own (see
+        connection()), but they share a single commit, and so a single fsync.
+        Their cache changes wait for that commit (see _after_commit()) and are
+        dropped if it fails. A group opened inside another one is just a
+        savepoint of it.
+        """
+        local = self._local
+        if getattr(local, "grouped", False):
+            mark = len(local.pending)
+            try:
+                with self.connection() as conn:
+                    yield conn
+            except BaseException:
+                # The savepoint was rolled back, and with it the writes these changes describe
+                del local.pending[mark:]
+                raise
+            return
+        conn = self.get_connection()
+        conn.execute('BEGIN IMMEDIATE')
+        local.grouped, local.pending = True, []
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            for change in local.pending:
+                change()
+        finally:
+            local.grouped, local.pending = False, None
+
+    def close(self):
+        with self._connections_lock:
+            self._generation += 1
+            while self._open_connections:
+                try:
+                    self._open_connections.pop().close()
+                except sqlite3.ProgrammingError:
+                    pass
+        with self._monitor_lock:
+            if self._monitor is not None:
+                self._monitor.close()
+                self._monitor = None
+
+    @contextmanager
+    def bulk_insert(self):
+        inserted = 0
+
+        def insert(rows):
+            nonlocal inserted
+            count = insert_contact_rows(conn, rows)
+            inserted += count
+            return count
+
+        with self.connection() as conn, deferred_search_index(conn):
+            yield insert
+        if inserted:
+            self._after_commit(self.invalidate_cache)
+
+    def numbers_in_use(self, numbers):
+        """The subset of `numbers` that some contact already has."""
+        numbers = list(numbers)
+        conn = self.get_connection()
+        taken = set()
+        # Stay well under SQLite's limit on bound parameters
+        for start in range(0, len(numbers), 500):
+            chunk = numbers[start:start + 500]
+            marks = ", ".join("?" * len(chunk))
+            taken.update(number for number, in conn.execute(f'SELECT phone_number FROM contacts WHERE phone_number IN ({marks})', chunk))
+        return taken
+
+    def _after_commit(self, change, *args):
+        """Apply a cache change now, or once this thread's open group_commit() commits.
+
+        Patching the cache (and bumping the version) before the data is
+        committed would let another thread load the cache without the row and
+        then never reload it, or read a row that is later rolled back.
+        """
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            pending.append(partial(change, *args))
+        else:
+            change(*args)
+
+    def _load_cache(self):
+        with instrumentation.timed("db.load_cache") as span:
+            self._cache = {contact.id: contact for contact in self.iter_contacts()}
+            span.rows = len(self._cache)
+        self._cache_snapshot = None
+
+    def _cache_put(self, contact):
+        with self._cache_lock:
+            if self._cache is not None:
+                self._cache[contact.id] = contact
+                self._cache_snapshot = None
+            self._version += 1
+
+    def _cache_remove(self, contact_id):
+        with self._cache_lock:
+            if self._cache is not None:
+                self._cache.pop(contact_id, None)
+                self._cache_snapshot = None
+            self._version += 1
+
+    def _cache_put_many(self, contacts):
+        with self._cache_lock:
+            if self._cache is not None:
+                for contact in contacts:
+                    # Only ids already cached exist in the table; unknown ids updated nothing
+                    if contact.id in self._cache:
+                        self._cache[contact.id] = contact
+                self._cache_snapshot = None
+            self._version += 1
+
+    def _cache_remove_many(self, contact_ids):
+        with self._cache_lock:
+            if self._cache is not None:
+                for contact_id in contact_ids:
+                    self._cache.pop(contact_id, None)
+                self._cache_snapshot = None
+            self._version += 1
+
+    def invalidate_cache(self):
+        with self._cache_lock:
+            self._cache = None
+            self._cache_snapshot = None
+            self._version += 1
+
+    def get_contacts_version(self):
+        return self._version
+
+    def get_data_version(self):
+        # data_version moves for commits made by other connections, so it is read on
+        # a connection of its own that never writes; with WAL this never waits on a writer
+        with self._monitor_lock:
+            if self._monitor is None:
+                self._monitor = sqlite3.connect(self.path, uri=self.uri, check_same_thread=False)
+            return self._monitor.execute('PRAGMA data_version').fetchone()[0]
+
+    def get_schema_version(self):
+        return self.get_connection().execute('PRAGMA user_version').fetchone()[0]
+
+    def initialize(self):
+        conn = self.get_connection()
+        if self.get_schema_version() >= len(MIGRATIONS):
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Another opener may have migrated while this one waited for the write lock
+            version = self.get_schema_version()
+            for number, migrate in enumerate(MIGRATIONS[version:], start=version + 1):
+                migrate(conn)
+                conn.execute(f'PRAGMA user_version = {number}')
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def add_contact(self, first_name, last_name, address, phone_number):
+        """Insert a contact and return its id; raises DuplicatePhoneError on a taken number."""
+        fields = _normalized(first_name, last_name, address, phone_number)
+        try:
+            with self.connection() as conn:
+                cursor = conn.execute('''
+                                      INSERT INTO contacts (first_name, last_name, address, phone_number)
+                                      VALUES (?, ?, ?, ?)
+                                      ''', fields)
+                _add_keys(conn, [(cursor.lastrowid, fields[0], fields[1])])
+        except sqlite3.IntegrityError as e:
+            if _is_phone_conflict(e):
+                raise DuplicatePhoneError(phone_number) from e
+            raise
+        contact_id = cursor.lastrowid
+        self._after_commit(self._cache_put, Contact(contact_id, *fields))
+        return contact_id
+
+    def phone_exists(self, phone_number, exclude_id=None):
+        with self.connection() as conn:
+            if exclude_id is None:
+                cursor = conn.execute('SELECT 1 FROM contacts WHERE phone_number = ? LIMIT 1', (phone_number,))
+            else:
+                cursor = conn.execute('SELECT 1 FROM contacts WHERE phone_number = ? AND id != ? LIMIT 1', (phone_number, exclude_id))
+            return cursor.fetchone() is not None
+
+    def _cache_usable(self):
+        # Inside group_commit() this thread sees writes the cache will only get
+        # on commit, and must not load uncommitted rows into it either
+        return not getattr(self._local, "grouped", False)
+
+    def get_all_contacts(self):
+        """All contacts in id order, served from the cache (treat the list as read-only)."""
+        if not self._cache_usable():
+            return list(self.iter_contacts())
+        with self._cache_lock:
+            if self._cache is None:
+                self._load_cache()
+            if self._cache_snapshot is None:
+                self._cache_snapshot = list(self._cache.values())
+            return self._cache_snapshot
+
+    def get_contact(self, contact_id):
+        with self._cache_lock:
+            if self._cache is not None and self._cache_usable():
+                return self._cache.get(contact_id)
+        with self.connection() as conn:
+            return _query_contacts(conn, f'SELECT {CONTACT_COLUMNS} FROM contacts WHERE id = ?', (contact_id,)).fetchone()
+
+    def count_contacts(self):
+        with self._cache_lock:
+            if self._cache is not None and self._cache_usable():
+                return len(self._cache)
+        with self.connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM contacts').fetchone()[0]
+
+    def has_contacts(self):
+        with self.connection() as conn:
+            return conn.execute('SELECT 1 FROM contacts LIMIT 1').fetchone() is not None
+
+    def update_contact(self, contact_id, first_name, last_name, address, phone_number):
+        """Update a contact; raises DuplicatePhoneError if another contact has the number."""
+        fields = _normalized(first_name, last_name, address, phone_number)
+        try:
+            with self.connection() as conn:
+                cursor = conn.execute('''
+                                      UPDATE contacts
+                                      SET first_name = ?, last_name = ?, address = ?, phone_number = ?
+                                      WHERE id = ?
+                                      ''', fields + (contact_id,))
+                if cursor.rowcount:
+                    _replace_keys(conn, [(contact_id, fields[0], fields[1])])
+        except sqlite3.IntegrityError as e:
+            if _is_phone_conflict(e):
+                raise DuplicatePhoneError(phone_number) from e
+            raise
+        if cursor.rowcount:
+            self._after_commit(self._cache_put, Contact(contact_id, *fields))
+
+    def delete_contact(self, contact_id):
+        with self.connection() as conn:
+            conn.execute('DELETE FROM contacts WHERE id = ?', (contact_id,))
+        self._after_commit(self._cache_remove, contact_id)
+
+    def update_contacts(self, rows):
+        """Update many contacts in one transaction; returns how many rows changed.
+
+        `rows` are (contact_id, first_name, last_name, address, phone_number)
+        tuples. Either every row is written or, on DuplicatePhoneError, none is.
+        """
+        contacts = [Contact(row[0], *_normalized(*row[1:])) for row in rows]
+        params = [contact[1:] + (contact.id,) for contact in contacts]
+        if not params:
+            return 0
+        try:
+            with self.connection() as conn:
+                cursor = conn.executemany('''
+                                          UPDATE contacts
+                                          SET first_name = ?, last_name = ?, address = ?, phone_number = ?
+                                          WHERE id = ?
+                                          ''', params)
+                _replace_keys(conn, [(contact.id, contact.first, contact.last) for contact in contacts])
+        except sqlite3.IntegrityError as e:
+            if _is_phone_conflict(e):
+                raise DuplicatePhoneError(_conflicting_number(self.get_connection(), params)) from e
+            raise
+        self._after_commit(self._cache_put_many, contacts)
+        return cursor.rowcount
+
+    def delete_contacts(self, contact_ids):
+        """Delete many contacts in one transaction; returns how many existed."""
+        contact_ids = [(contact_id,) for contact_id in contact_ids]
+        if not contact_ids:
+            return 0
+        with self.connection() as conn:
+            cursor = conn.executemany('DELETE FROM contacts WHERE id = ?', contact_ids)
+        self._after_commit(self._cache_remove_many, [contact_id for contact_id, in contact_ids])
+        return cursor.rowcount
+
+    def search_contacts(self, field, query, limit=None):
+        """Contacts whose `field` contains `query` (case-insensitive), best matches first.
 
-    cursor.execute('''
-                   UPDATE contacts
-                   SET first_name = ?, last_name = ?, address = ?, phone_number = ?
-                   WHERE id = ?
-                   ''', (first_name.title(), last_name.title(), address.title(), phone_number, contact_id))
-    
-    conn.commit()
-    conn.close()
+        Queries of three or more characters use the trigram FTS5 index; shorter
+        ones (which trigrams cannot match) fall back to a LIKE scan.
+        """
+        column = SEARCH_FIELDS[field]
+        query = query.strip()
+        columns = [column] if column else ["first_name", "last_name", "address", "phone_number"]
+        if column == "phone_number":
+            query = "".join(ch for ch in query if ch.isdigit())
+        if not query:
+            return []
+        limit = -1 if limit is None else limit
 
+        with self.connection() as conn:
+            if len(query) >= 3 and _has_fts(conn):
+                phrase = '"' + query.replace('"', '""') + '"'
+                match = f"{column} : {phrase}" if column else phrase
+                rows = _query_contacts(conn, '''
+                                    SELECT c.id, c.first_name, c.last_name, c.address, c.phone_number
+                                    FROM contacts_fts JOIN contacts c ON c.id = contacts_fts.rowid
+                                    WHERE contacts_fts MATCH ?
+                                    ORDER BY rank
+                                    LIMIT ?
+                                    ''', (match, limit)).fetchall()
+            else:
+                pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                where = " OR ".join(f"{c} LIKE ? ESCAPE '\\'" for c in columns)
+                rows = _query_contacts(conn, f'''
+                                    SELECT {CONTACT_COLUMNS}
+                                    FROM contacts
+                                    WHERE {where}
+                                    ORDER BY {columns[0]} COLLATE NOCASE, id
+                                    LIMIT ?
+                                    ''', [pattern] * len(columns) + [limit]).fetchall()
+        return rows
+
+    def fuzzy_search_contacts(self, field, query, limit=20, min_score=0.3):
+        return [contact for _, contact in self.fuzzy_search_scored(field, query, limit, min_score)]
+
+    def fuzzy_search_scored(self, field, query, limit=20, min_score=0.3):
+        """(score, contact) pairs for contacts that look or sound like `query`, best first.
+
+        Candidates come from indexes only: the per-word Soundex keys in
+        contact_keys (rows matching the most query keys, then the most fields,
+        first) and the trigram FTS table (rows sharing any trigram with the
+        query, best bm25 first). They are then scored by trigram similarity,
+        lifted towards 1.0 by the share of query words that sound alike (halfway
+        when all do), and anything under `min_score` is dropped.
+        Contact numbers have no spelling to be fuzzy about and use search_contacts().
+        """
+        if field == "contact number":
+            return [(1.0, contact) for contact in self.search_contacts(field, query, limit=limit)]
+        fields, key_fields = _FUZZY_TARGETS[field]
+        query = " ".join(query.split())
+        if not query:
+            return []
+        keys = fuzzy.phonetic_keys(query) if key_fields else set()
+        candidate_limit = max(200, limit * 10)
+        candidates = {}
+
+        with self.connection() as conn:
+            if keys:
+                # Common keys match far more rows than the limit, so the best
+                # phonetic matches are ranked first instead of being cut off
+                rows = _query_contacts(conn, f'''
+                                    SELECT c.id, c.first_name, c.last_name, c.address, c.phone_number
+                                    FROM (SELECT contact_id, COUNT(DISTINCT key) AS keys, COUNT(DISTINCT field) AS fields
+                                          FROM contact_keys
+                                          WHERE key IN ({", ".join("?" * len(keys))}) AND field IN ({", ".join("?" * len(key_fields))})
+                                          GROUP BY contact_id
+                                          ORDER BY keys DESC, fields DESC, contact_id
+                                          LIMIT ?) matched
+                                    JOIN contacts c ON c.id = matched.contact_id
+                                    ''', list(keys) + list(key_fields) + [candidate_limit])
+                candidates.update((c.id, c) for c in rows)
+
+            grams = {word[i:i + 3] for word in fuzzy.words(query) for i in range(len(word) - 2)}
+            if grams and _has_fts(conn):
+                columns = [SEARCH_FIELDS[field]] if field != "all fields" else ["first_name", "last_name", "address"]
+                terms = " OR ".join('"' + gram.replace('"', '""') + '"' for gram in sorted(grams))
+                rows = _query_contacts(conn, '''
+                                    SELECT c.id, c.first_name, c.last_name, c.address, c.phone_number
+                                    FROM contacts_fts JOIN contacts c ON c.id = contacts_fts.rowid
+                                    WHERE contacts_fts MATCH ?
+                                    ORDER BY rank
+                                    LIMIT ?
+                                    ''', (f"{{{' '.join(columns)}}} : ({terms})", candidate_limit))
+                candidates.update((c.id, c) for c in rows)
+
+        lowered = query.lower()
+        word_count = max(1, len(fuzzy.words(query)))
+        scored = []
+        for contact in candidates.values():
+            texts = [getattr(contact, name) for name in fields]
+            if field == "all fields":
+                texts.append(f"{contact.first} {contact.last}")
+            score = max(fuzzy.best_similarity(lowered, text) for text in texts)
+            if keys:
+                sounds = set().union(*(fuzzy.phonetic_keys(getattr(contact, name)) for name in key_fields))
+                score += (1 - score) * min(1, len(keys & sounds) / word_count) / 2
+            if score >= min_score:
+                scored.append((score, -contact.id, contact))
+        return [(score, contact) for score, _, contact in nlargest(limit, scored)]
+
+    def get_contacts_page(self, limit=100, after=None, before=None, order_by="id", descending=False):
+        """One page of contacts using keyset pagination.
+
+        `after` / `before` is a contact from an earlier page; the result continues
+        past it (or ends just before it) in the chosen order, so deep pages cost
+        an index seek instead of an OFFSET scan.
+        """
+        column = SORT_COLUMNS[order_by]
+        anchor = before if before is not None else after
+        # Walking backwards means reading the opposite order and flipping the page
+        reverse = descending != (before is not None)
+        direction = "DESC" if reverse else "ASC"
+        op = "<" if reverse else ">"
+
+        where, params = "", []
+        if anchor is not None:
+            if order_by == "id":
+                where, params = f"WHERE id {op} ?", [anchor.id]
+            else:
+                # Spelled out rather than as a row value so SQLite can seek the NOCASE index
+                value = getattr(anchor, order_by)
+                where, params = f"WHERE {column} {op}= ? AND ({column} {op} ? OR id {op} ?)", [value, value, anchor.id]
+
+        with self.connection() as conn:
+            contacts = _query_contacts(conn, f'''
+                                SELECT {CONTACT_COLUMNS}
+                                FROM contacts
+                                {where}
+                                ORDER BY {column} {direction}, id {direction}
+                                LIMIT ?
+                                ''', params + [limit]).fetchall()
+        if before is not None:
+            contacts.reverse()
+        return contacts
+
+    def iter_contacts(self, batch_size=1000, where=None, params=(), order_by="id", descending=False):
+        """Yield contacts one at a time, fetching `batch_size` rows per round trip.
+
+        `where` is an optional SQL condition over the contacts columns with `?`
+        placeholders bound from `params`. Nothing is accumulated, so memory stays
+        bounded however large the table is.
+        """
+        direction = "DESC" if descending else "ASC"
+        condition = f"WHERE {where}" if where else ""
+        cursor = _query_contacts(self.get_connection(), f'''
+                                 SELECT {CONTACT_COLUMNS}
+                                 FROM contacts
+                                 {condition}
+                                 ORDER BY {SORT_COLUMNS[order_by]} {direction}, id {direction}
+                                 ''', params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+
+class MemoryStore(SQLiteStore):
+    """An address book held in memory for as long as the store object lives.
+
+    Uses SQLite's memdb VFS so every thread's pooled connection sees the same
+    database. There is no WAL in memory: readers wait for a writer's commit
+    instead of reading alongside it.
+    """
+
+    _names = itertools.count(1)
+
+    def __init__(self, name=None):
+        name = name or f"addressbook-{next(MemoryStore._names)}"
+        super().__init__(f"file:/{name}?vfs=memdb", uri=True)
+        # memdb frees the database when its last connection closes, and close() only closes the pool
+        self._keeper = sqlite3.connect(self.path, uri=True, check_same_thread=False)
+
+    def get_data_version(self):
+        # Only this process can reach the database, so get_contacts_version() already
+        # covers its writes; PRAGMA data_version would block here while a write is open
+        return 0
+
+_SHARD_FILE = re.compile(r"shard_\d+\.db")
+
+class ShardedStore(ContactStore):
+    """Contacts split across `shards` SQLite files in `directory`, queried in parallel.
+
+    A new contact goes to the shard picked by a CRC32 of its phone number and
+    stays there; its id encodes the shard (local_id * shards + index), so
+    reads and writes by id touch one file. Counts, searches, pages and scans
+    fan out over a thread pool and the per-shard results are merged.
+
+    Numbers stay unique across shards because writes check the other shards
+    under a store-wide lock, which holds within one process. Batches that
+    span shards commit shard by shard.
+    """
+
+    def __init__(self, directory, shards=4, max_workers=None):
+        existing = [name for name in os.listdir(directory) if _SHARD_FILE.fullmatch(name)] if os.path.isdir(directory) else []
+        if existing and len(existing) != shards:
+            # Ids encode the shard count, so it can never change for a book
+            raise ValueError(f"{directory} holds {len(existing)} shards, not {shards}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.shards = [SQLiteStore(os.path.join(directory, f"shard_{index:03d}.db")) for index in range(shards)]
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or shards, thread_name_prefix="shard")
+        self._write_lock = threading.RLock()
+        self._snapshot = None
+
+    def __repr__(self):
+        return f"ShardedStore({self.directory!r}, shards={len(self.shards)})"
+
+    def _locate(self, contact_id):
+        return contact_id % len(self.shards), contact_id // len(self.shards)
+
+    def _global(self, index, contact):
+        return contact._replace(id=contact.id * len(self.shards) + index)
+
+    def _home(self, phone_number):
+        # crc32 rather than hash(), which is salted differently in every process
+        return zlib.crc32(phone_number.encode()) % len(self.shards)
+
+    def _each(self, call):
+        # call(index, shard) for every shard on the pool, results in shard order
+        return list(self._pool.map(call, range(len(self.shards)), self.shards))
+
+    def _taken_elsewhere(self, phone_number, index):
+        # Asked on the calling thread so writes of its open group_commit() count;
+        # shard `index` itself is covered by its unique index
+        return any(shard.phone_exists(phone_number) for other, shard in enumerate(self.shards) if other != index)
+
+    def initialize(self):
+        self._each(lambda index, shard: shard.initialize())
+
+    def get_schema_version(self):
+        return min(self._each(lambda index, shard: shard.get_schema_version()))
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+    def thread_connections(self):
+        # Fan-out queries run on the pool's connections, shared by every caller;
+        # a stale query is left to finish rather than interrupted
+        return []
+
+    @contextmanager
+    def group_commit(self):
+        with ExitStack() as stack:
+            for shard in self.shards:
+                stack.enter_context(shard.group_commit())
+            yield
+
+    @contextmanager
+    def bulk_insert(self):
+        with self._write_lock, ExitStack() as stack:
+            inserters = [stack.enter_context(shard.bulk_insert()) for shard in self.shards]
+
+            def insert(rows):
+                taken = set()
+                for shard in self.shards:
+                    taken |= shard.numbers_in_use(row[3] for row in rows)
+                routed = [[] for _ in self.shards]
+                for row in rows:
+                    if row[3] not in taken:
+                        routed[self._home(row[3])].append(row)
+                return sum(inserter(part) for inserter, part in zip(inserters, routed) if part)
+
+            yield insert
+
+    def invalidate_cache(self):
+        for shard in self.shards:
+            shard.invalidate_cache()
+
+    def get_contacts_version(self):
+        # Each shard's counter only goes up, so their sum changes whenever any does
+        return sum(shard.get_contacts_version() for shard in self.shards)
+
+    def get_data_version(self):
+        return "-".join(str(shard.get_data_version()) for shard in self.shards)
+
+    def add_contact(self, first_name, last_name, address, phone_number):
+        fields = _normalized(first_name, last_name, address, phone_number)
+        index = self._home(fields[3])
+        with self._write_lock:
+            if self._taken_elsewhere(fields[3], index):
+                raise DuplicatePhoneError(phone_number)
+            local_id = self.shards[index].add_contact(*fields)
+        return local_id * len(self.shards) + index
+
+    def phone_exists(self, phone_number, exclude_id=None):
+        owner = None if exclude_id is None else self._locate(exclude_id)
+
+        def check(index, shard):
+            return shard.phone_exists(phone_number, owner[1] if owner and owner[0] == index else None)
+
+        return any(self._each(check))
+
+    def get_contact(self, contact_id):
+        index, local_id = self._locate(contact_id)
+        contact = self.shards[index].get_contact(local_id)
+        return None if contact is None else contact._replace(id=contact_id)
+
+    def get_all_contacts(self):
+        version = self.get_contacts_version()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot[0] != version:
+            parts = self._each(lambda index, shard: [self._global(index, c) for c in shard.get_all_contacts()])
+            snapshot = self._snapshot = (version, list(merge(*parts, key=attrgetter("id"))))
+        return snapshot[1]
+
+    def count_contacts(self):
+        return sum(self._each(lambda index, shard: shard.count_contacts()))
+
+    def has_contacts(self):
+        return any(self._each(lambda index, shard: shard.has_contacts()))
+
+    def update_contact(self, contact_id, first_name, last_name, address, phone_number):
+        fields = _normalized(first_name, last_name, address, phone_number)
+        index, local_id = self._locate(contact_id)
+        with self._write_lock:
+            if self._taken_elsewhere(fields[3], index):
+                raise DuplicatePhoneError(phone_number)
+            self.shards[index].update_contact(local_id, *fields)
+
+    def delete_contact(self, contact_id):
+        index, local_id = self._locate(contact_id)
+        self.shards[index].delete_contact(local_id)
+
+    def update_contacts(self, rows):
+        routed, seen = {}, set()
+        for contact_id, *fields in rows:
+            fields = _normalized(*fields)
+            if fields[3] in seen:
+                raise DuplicatePhoneError(fields[3])
+            seen.add(fields[3])
+            index, local_id = self._locate(contact_id)
+            routed.setdefault(index, []).append((local_id,) + fields)
+        with self._write_lock:
+            for index, part in routed.items():
+                for row in part:
+                    if self._taken_elsewhere(row[4], index):
+                        raise DuplicatePhoneError(row[4])
+            return self._write_routed(routed, lambda shard, part: shard.update_contacts(part))
+
+    def delete_contacts(self, contact_ids):
+        routed = {}
+        for contact_id in contact_ids:
+            index, local_id = self._locate(contact_id)
+            routed.setdefault(index, []).append(local_id)
+        return self._write_routed(routed, lambda shard, part: shard.delete_contacts(part))
+
+    def _write_routed(self, routed, write):
+        if len(routed) <= 1:
+            return sum(write(self.shards[index], part) for index, part in routed.items())
+        # A failure in any shard rolls back every shard's part of the batch
+        with self.group_commit():
+            return sum(write(self.shards[index], part) for index, part in routed.items())
+
+    def search_contacts(self, field, query, limit=None):
+        parts = self._each(lambda index, shard: [self._global(index, c) for c in shard.search_contacts(field, query, limit=limit)])
+        # Each shard ranks its own matches; interleave them so every shard's best come first
+        merged = [contact for row in itertools.zip_longest(*parts) for contact in row if contact is not None]
+        return merged if limit is None else merged[:limit]
+
+    def fuzzy_search_contacts(self, field, query, limit=20, min_score=0.3):
+        parts = self._each(lambda index, shard: [(score, self._global(index, contact))
+                                                 for score, contact in shard.fuzzy_search_scored(field, query, limit, min_score)])
+        best = nlargest(limit, itertools.chain(*parts), key=lambda pair: (pair[0], -pair[1].id))
+        return [contact for _, contact in best]
+
+    def get_contacts_page(self, limit=100, after=None, before=None, order_by="id", descending=False):
+        anchor = before if before is not None else after
+        reverse = descending != (before is not None)
+        count = len(self.shards)
+
+        def page(index, shard):
+            local_anchor = None
+            if anchor is not None:
+                # Shard-local id bound equivalent to the anchor's global id: local ids
+                # above floor((id - index) / count) map above it, those below the
+                # ceiling map below it
+                bound = -((index - anchor.id) // count) if reverse else (anchor.id - index) // count
+                local_anchor = anchor._replace(id=bound)
+            side = {"before": local_anchor} if before is not None else {"after": local_anchor}
+            contacts = shard.get_contacts_page(limit=limit, order_by=order_by, descending=descending, **side)
+            return [self._global(index, c) for c in contacts]
+
+        merged = list(merge(*self._each(page), key=_sort_key(order_by), reverse=descending))
+        return merged[-limit:] if before is not None else merged[:limit]
+
+    def iter_contacts(self, batch_size=1000, where=None, params=(), order_by="id", descending=False):
+        """Every shard's rows merged into one ordered stream.
+
+        `where` runs on each shard as written, so it must not compare ids
+        (those are shard-local there).
+        """
+        streams = [map(partial(self._global, index), shard.iter_contacts(batch_size, where, params, order_by, descending))
+                   for index, shard in enumerate(self.shards)]
+        return merge(*streams, key=_sort_key(order_by), reverse=descending)
+
+def open_store(spec):
+    """Build a store from a spec string:
+
+        path/to/book.db        SQLiteStore (also written sqlite:path/to/book.db)
+        memory: or :memory:    MemoryStore
+        sharded:4:path/to/dir  ShardedStore over 4 files in the directory
+    """
+    if spec in ("memory:", ":memory:"):
+        return MemoryStore()
+    if spec.startswith("sharded:"):
+        count, _, directory = spec[len("sharded:"):].partition(":")
+        if not count.isdigit() or int(count) < 1 or not directory:
+            raise ValueError(f"expected sharded:<count>:<directory>, got {spec!r}")
+        return ShardedStore(directory, int(count))
+    if spec.startswith("sqlite:"):
+        spec = spec[len("sqlite:"):]
+    return SQLiteStore(spec)
+
+_store = None
+_store_key = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """The store behind the module-level functions, opened from store_spec or database_name.
+
+    Changing either setting makes the next call open the new store.
+    """
+    global _store, _store_key
+    key = store_spec or database_name
+    if _store is None or _store_key != key:
+        with _store_lock:
+            if _store is None or _store_key != key:
+                if _store is not None:
+                    _store.close()
+                _store, _store_key = open_store(key), key
+    return _store
+
+def set_store(store):
+    """Use `store` for the module-level functions until store_spec or database_name changes."""
+    global _store, _store_key
+    with _store_lock:
+        if _store is not None and _store is not store:
+            _store.close()
+        _store, _store_key = store, store_spec or database_name
+
+# The module-level API, as thin wrappers over get_store()
+
+def _single_file_store():
+    store = get_store()
+    if not isinstance(store, SQLiteStore):
+        raise TypeError(f"{store!r} is not a single SQLite file, so it has no connection to hand out; "
+                        "use the module-level functions instead")
+    return store
+
+def get_connection():
+    """This thread's pooled connection to the default store (single-file stores only)."""
+    return _single_file_store().get_connection()
+
+def connection():
+    """connection() of the default store (single-file stores only)."""
+    return _single_file_store().connection()
+
+def group_commit():
+    return get_store().group_commit()
+
+def thread_connections():
+    return get_store().thread_connections()
+
+def bulk_insert():
+    return get_store().bulk_insert()
+
+def close_connections():
+    """Close the default store's pooled connections; threads reopen lazily on next use."""
+    if _store is not None:
+        _store.close()
+
+atexit.register(close_connections)
+
+def invalidate_cache():
+    get_store().invalidate_cache()
+
+def get_contacts_version():
+    return get_store().get_contacts_version()
+
+def get_data_version():
+    return get_store().get_data_version()
+
+def get_schema_version():
+    return get_store().get_schema_version()
+
+def initialize_database():
+    get_store().initialize()
+
+@instrumented("db.add_contact")
+def add_contact(first_name, last_name, address, phone_number):
+    """Insert a contact and return its id; raises DuplicatePhoneError on a taken number."""
+    return get_store().add_contact(first_name, last_name, address, phone_number)
+
+@instrumented("db.phone_exists")
+def phone_exists(phone_number, exclude_id=None):
+    return get_store().phone_exists(phone_number, exclude_id)
+
+@instrumented("db.get_all_contacts", rows=len)
+def get_all_contacts():
+    """All contacts in id order, served from the cache (treat the list as read-only)."""
+    return get_store().get_all_contacts()
+
+@instrumented("db.get_contact")
+def get_contact(contact_id):
+    return get_store().get_contact(contact_id)
+
+@instrumented("db.count_contacts")
+def count_contacts():
+    return get_store().count_contacts()
+
+def has_contacts():
+    return get_store().has_contacts()
+
+@instrumented("db.update_contact")
+def update_contact(contact_id, first_name, last_name, address, phone_number):
+    """Update a contact; raises DuplicatePhoneError if another contact has the number."""
+    get_store().update_contact(contact_id, first_name, last_name, address, phone_number)
+
+@instrumented("db.delete_contact")
 def delete_contact(contact_id):
-    conn = get_connection()
-    
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM contacts WHERE id = ?', (contact_id,))
+    get_store().delete_contact(contact_id)
+
+@instrumented("db.update_contacts", rows=int)
+def update_contacts(rows):
+    """Update many (contact_id, first, last, address, number) rows together; returns how many changed."""
+    return get_store().update_contacts(rows)
+
+@instrumented("db.delete_contacts", rows=int)
+def delete_contacts(contact_ids):
+    """Delete many contacts together; returns how many existed."""
+    return get_store().delete_contacts(contact_ids)
+
+@instrumented("db.search_contacts", rows=len)
+def search_contacts(field, query, limit=None):
+    """Contacts whose `field` contains `query` (case-insensitive), best matches first."""
+    return get_store().search_contacts(field, query, limit)
+
+@instrumented("db.fuzzy_search_contacts", rows=len)
+def fuzzy_search_contacts(field, query, limit=20, min_score=0.3):
+    """Contacts that look or sound like `query`, best match first (at most `limit`)."""
+    return get_store().fuzzy_search_contacts(field, query, limit, min_score)
+
+@instrumented("db.get_contacts_page", rows=len)
+def get_contacts_page(limit=100, after=None, before=None, order_by="id", descending=False):
+    """One page of contacts continuing past `after` (or ending before `before`), keyset style."""
+    return get_store().get_contacts_page(limit=limit, after=after, before=before, order_by=order_by, descending=descending)
 
-    conn.commit()
-    conn.close()
+def iter_contacts(batch_size=1000, where=None, params=(), order_by="id", descending=False):
+    """Yield every contact (optionally filtered by SQL `where`) without accumulating them."""
+    return get_store().iter_contacts(batch_size, where, params, order_by, descending)
@@ -0,0 +1,83 @@
+"""Spelling-tolerant matching helpers used by database.fuzzy_search_contacts().
+
+phonetic_keys() gives the Soundex keys stored for each name, one per word
+(so "Jon" and "John" share a key and can be looked up through an index);
+trigrams() and similarity() score how alike two strings look, in the style
+of pg_trgm.
+"""
+
+import re
+from functools import lru_cache
+
+_WORD_PATTERN = re.compile(r"[^\W_]+")
+
+_SOUNDEX_CODES = {
+    letter: digit
+    for letters, digit in (("BFPV", "1"), ("CGJKQSXZ", "2"), ("DT", "3"), ("L", "4"), ("MN", "5"), ("R", "6"))
+    for letter in letters
+}
+
+def soundex(name):
+    """American Soundex of `name` ("Robert" -> "R163"); "" when it has no letters."""
+    letters = [ch for ch in name.upper() if "A" <= ch <= "Z"]
+    if not letters:
+        return ""
+    first = letters[0]
+    digits = []
+    previous = _SOUNDEX_CODES.get(first, "")
+    for ch in letters[1:]:
+        code = _SOUNDEX_CODES.get(ch, "")
+        if code and code != previous:
+            digits.append(code)
+            if len(digits) == 3:
+                break
+        # H and W do not separate letters with the same code; vowels do
+        if ch not in "HW":
+            previous = code
+    return (first + "".join(digits)).ljust(4, "0")
+
+@lru_cache(maxsize=8192)
+def phonetic_keys(text):
+    """Soundex keys of every word in `text` and of the text as a whole (for "Dela Cruz").
+
+    Memoized, since names repeat heavily across an import; hence the frozenset.
+    """
+    keys = {soundex(word) for word in words(text)}
+    keys.add(soundex(text))
+    keys.discard("")
+    return frozenset(keys)
+
+def words(text):
+    """Lower-cased words of `text`, punctuation dropped."""
+    return _WORD_PATTERN.findall(text.lower())
+
+def trigrams(text):
+    """Padded, lower-cased 3-letter shingles of each word."""
+    grams = set()
+    for word in words(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def _jaccard(grams_a, grams_b):
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+def similarity(a, b):
+    """Share of trigrams the two strings have in common, from 0.0 to 1.0."""
+    return _jaccard(trigrams(a), trigrams(b))
+
+def best_similarity(query, text):
+    """similarity() of `query` against the closest run of as many words in `text`.
+
+    Lets "quezn cty" score well against "104 Luna St, Quezon City", where the
+    rest of the address would otherwise drown the match.
+    """
+    query_grams = trigrams(query)
+    text_words = words(text)
+    size = max(1, len(words(query)))
+    best = _jaccard(query_grams, trigrams(text))
+    for start in range(len(text_words) - size + 1):
+        best = max(best, _jaccard(query_grams, trigrams(" ".join(text_words[start:start + size]))))
+    return best
@@ -0,0 +1,199 @@
+"""Opt-in timing for the data layer and the GUI.
+
+Off by default; instrumented functions then cost one flag check per call.
+Set environment variables before starting the app (or call enable()):
+
+    ADDRESSBOOK_STATS=1             print the stats table to stderr at exit
+    ADDRESSBOOK_STATS=stats.json    write the stats as JSON at exit instead
+    ADDRESSBOOK_PROFILE=run.prof    run the session under cProfile (main thread)
+                                    and save it for `python -m pstats run.prof`
+
+Each operation records its call count, total/max latency, a latency
+histogram and the rows it touched. Connections opened while enabled also
+trace every SQL statement with set_trace_callback(); a statement's time is
+measured until the next statement or the end of the enclosing operation on
+the same thread, so it includes fetching its rows and any work its
+triggers or the FTS index do.
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+STATS_ENV = "ADDRESSBOOK_STATS"
+PROFILE_ENV = "ADDRESSBOOK_PROFILE"
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, float("inf"))
+
+_enabled = False
+_stats = {}
+_lock = threading.Lock()
+_local = threading.local()
+_profiler = None
+
+class OperationStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.histogram = [0] * len(BUCKETS_MS)
+
+    def add(self, seconds, rows):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if rows:
+            self.rows += rows
+        ms = seconds * 1000
+        for index, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.histogram[index] += 1
+                break
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total / self.count * 1000, 4) if self.count else 0,
+            "max_ms": round(self.max * 1000, 3),
+            "rows": self.rows,
+            "histogram_ms": {("inf" if bound == float("inf") else str(bound)): n
+                             for bound, n in zip(BUCKETS_MS, self.histogram) if n},
+        }
+
+def enabled():
+    return _enabled
+
+def enable():
+    """Start recording; only connections opened from now on trace their SQL."""
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+def record(name, seconds, rows=None):
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = OperationStats()
+        stats.add(seconds, rows)
+
+class _Span:
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        self.rows = None
+
+@contextmanager
+def timed(name):
+    """Time the block as operation `name`; set `.rows` on the yielded span to count rows."""
+    if not _enabled:
+        yield _Span()
+        return
+    span = _Span()
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        end = time.perf_counter()
+        _finish_statement(end)
+        record(name, end - start, span.rows)
+
+def instrumented(name, rows=None):
+    """Decorator form of timed(); `rows` maps the return value to a row count (e.g. len)."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                _finish_statement(end)
+            record(name, end - start, rows(result) if rows is not None and result is not None else None)
+            return result
+        return wrapper
+    return decorate
+
+def _finish_statement(now):
+    pending = getattr(_local, "statement", None)
+    if pending is not None:
+        _local.statement = None
+        record("sql: " + pending[0], now - pending[1])
+
+def _trace_statement(sql):
+    if sql.startswith("--"):
+        return  # run by a trigger or FTS5 on behalf of the current statement, so its time stays there
+    now = time.perf_counter()
+    _finish_statement(now)
+    # Collapse the indentation of the triple-quoted SQL so equal statements group together
+    _local.statement = (" ".join(sql.split())[:200], now)
+
+def attach(conn):
+    """Trace every statement run on `conn` when instrumentation is enabled."""
+    if _enabled:
+        conn.set_trace_callback(_trace_statement)
+
+def report():
+    """Snapshot of every operation's stats, slowest total first."""
+    with _lock:
+        items = [(name, stats.as_dict()) for name, stats in _stats.items()]
+    items.sort(key=lambda item: item[1]["total_ms"], reverse=True)
+    return dict(items)
+
+def format_report():
+    lines = [f"{'operation':<60} {'count':>8} {'total ms':>11} {'mean ms':>10} {'max ms':>10} {'rows':>9}"]
+    for name, row in report().items():
+        label = name if len(name) <= 60 else name[:57] + "..."
+        lines.append(f"{label:<60} {row['count']:>8} {row['total_ms']:>11.2f} {row['mean_ms']:>10.3f} {row['max_ms']:>10.2f} {row['rows']:>9}")
+    return "\n".join(lines)
+
+def dump(path=None):
+    """Write the stats as JSON to `path`, or print the table to stderr."""
+    if path:
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(report(), fp, indent=2)
+    else:
+        print(format_report(), file=sys.stderr)
+
+def start_profile():
+    global _profiler
+    if _profiler is None:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+def stop_profile(path):
+    global _profiler
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(path)
+        _profiler = None
+
+def _at_exit():
+    target = os.environ.get(STATS_ENV)
+    if _enabled and target:
+        dump(None if target == "1" else target)
+    if os.environ.get(PROFILE_ENV):
+        stop_profile(os.environ[PROFILE_ENV])
+
+if os.environ.get(STATS_ENV):
+    enable()
+if os.environ.get(PROFILE_ENV):
+    start_profile()
+atexit.register(_at_exit)
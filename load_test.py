@@ -0,0 +1,234 @@
+"""Load test for the HTTP API: concurrent keep-alive clients against a local server.
+
+By default it seeds a temporary book, starts `cli.py serve` on a free port
+in a subprocess and runs each client count in turn, so the table shows how
+throughput holds up as concurrency grows:
+
+    python load_test.py
+    python load_test.py --clients 1 16 64 --duration 10 --size 100000 --store sharded:4
+    python load_test.py --url http://127.0.0.1:8080     # an already running server
+
+Each client keeps one connection open and loops over a mix of list pages,
+searches, lookups by id and (--write-ratio) adds and edits. Like a caching
+HTTP client it revalidates list and search URLs with If-None-Match, so the
+304s the server's ETags allow are part of the measured traffic.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from urllib.parse import quote, urlsplit
+
+import contact_io
+import database
+from benchmark import FIRST_NAMES, LAST_NAMES, CITIES, generate_contacts, store_spec, synthetic_number
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LIST_SORTS = ("id", "last", "first")
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection that sends JSON and reads whole replies."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+    async def request(self, method, path, body=None, headers=None):
+        data = b"" if body is None else json.dumps(body).encode()
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(data)}"]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + data)
+        head = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(head[0].split(" ")[1])
+        reply_headers = {}
+        for line in head[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                reply_headers[name.strip().lower()] = value.strip()
+        length = int(reply_headers.get("content-length", 0))
+        return status, reply_headers, await self.reader.readexactly(length) if length else b""
+
+class Workload:
+    """The request mix; `ids` are existing contacts and `numbers` yields unused numbers.
+
+    `cursors` maps each of LIST_SORTS to "next" cursors the server handed out.
+    """
+
+    def __init__(self, ids, cursors, numbers, write_ratio):
+        self.ids = ids
+        self.numbers = numbers
+        self.write_ratio = write_ratio
+        # A bounded set of list/search URLs, so repeats can be answered from the cache
+        self.list_paths = [f"/contacts?limit=50&sort={sort}" + (f"&after={after}" if after else "")
+                           for sort in LIST_SORTS for after in [None] + cursors[sort]]
+        terms = [name[:4] for name in FIRST_NAMES + LAST_NAMES] + [city[:6] for city in CITIES]
+        self.search_paths = [f"/search?q={quote(term)}&limit=20" for term in terms]
+        self.search_paths += [f"/search?q={quote(name[:2] + name[3:])}&limit=20&fuzzy=1" for name in FIRST_NAMES]
+
+    def next(self, rng):
+        """(kind, method, path, body) of the next request."""
+        if rng.random() < self.write_ratio:
+            if rng.random() < 0.5:
+                body = {"first": rng.choice(FIRST_NAMES), "last": rng.choice(LAST_NAMES),
+                        "address": f"{rng.randint(1, 999)} Load St, {rng.choice(CITIES)}", "number": next(self.numbers)}
+                return "add", "POST", "/contacts", body
+            body = {"address": f"{rng.randint(1, 999)} Edit St, {rng.choice(CITIES)}"}
+            return "edit", "PATCH", f"/contacts/{rng.choice(self.ids)}", body
+        roll = rng.random()
+        if roll < 0.45:
+            return "list", "GET", rng.choice(self.list_paths), None
+        if roll < 0.75:
+            return "search", "GET", rng.choice(self.search_paths), None
+        return "get", "GET", f"/contacts/{rng.choice(self.ids)}", None
+
+async def _client(host, port, workload, seed, deadline, latencies, statuses):
+    rng = random.Random(seed)
+    etags = {}
+    connection = Connection(host, port)
+    await connection.open()
+    try:
+        while time.perf_counter() < deadline:
+            kind, method, path, body = workload.next(rng)
+            headers = {"If-None-Match": etags[path]} if method == "GET" and path in etags else None
+            start = time.perf_counter()
+            status, reply_headers, _ = await connection.request(method, path, body, headers)
+            latencies[kind].append(time.perf_counter() - start)
+            statuses[status] += 1
+            if "etag" in reply_headers:
+                etags[path] = reply_headers["etag"]
+    finally:
+        connection.close()
+
+async def run_level(host, port, workload, clients, duration, seed):
+    """Run `clients` concurrent clients for `duration` seconds; returns one result row per request kind."""
+    latencies, statuses = defaultdict(list), Counter()
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, workload, seed + index, deadline, latencies, statuses) for index in range(clients)))
+    elapsed = time.perf_counter() - started
+    rows = []
+    for kind in ("list", "search", "get", "add", "edit", "all"):
+        samples = sorted(itertools.chain(*latencies.values()) if kind == "all" else latencies.get(kind, []))
+        if not samples:
+            continue
+        rows.append({
+            "clients": clients,
+            "kind": kind,
+            "count": len(samples),
+            "req_per_sec": round(len(samples) / elapsed, 1),
+            "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+            "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 3),
+        })
+    total = sum(statuses.values())
+    rows[-1]["not_modified"] = round(statuses[304] / total, 3) if total else 0
+    rows[-1]["errors"] = sum(count for status, count in statuses.items() if status >= 500)
+    return rows
+
+def _format(row):
+    extra = f"  304s {row['not_modified']:>6.1%}  5xx {row['errors']}" if "errors" in row else ""
+    return (f"{row['clients']:>7} {row['kind']:<7} {row['count']:>8} {row['req_per_sec']:>10.1f}/s"
+            f"  p50 {row['p50_ms']:>8.3f} ms  p99 {row['p99_ms']:>8.3f} ms{extra}")
+
+def _start_server(spec, workers):
+    """Launch `cli.py serve` on a free port; returns (process, host, port)."""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "cli.py"), "--store", spec, "serve", "--port", "0", "--workers", str(workers)],
+        stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("Serving"):
+        process.kill()
+        raise RuntimeError(f"server did not start: {line!r}")
+    address = urlsplit(line.split()[-1])
+    return process, address.hostname, address.port
+
+async def _cursors(connection, sort, pages=50):
+    # Walk the first pages of one sort order, keeping each "next" cursor
+    cursors, path = [], f"/contacts?limit=20&sort={sort}"
+    while len(cursors) < pages:
+        status, _, body = await connection.request("GET", path + (f"&after={cursors[-1]}" if cursors else ""))
+        cursor = json.loads(body)["next"] if status == 200 else None
+        if cursor is None:
+            break
+        cursors.append(cursor)
+    return cursors
+
+async def _load_test(host, port, args):
+    connection = Connection(host, port)
+    await connection.open()
+    try:
+        status, _, body = await connection.request("GET", "/contacts?limit=1000")
+        if status != 200:
+            raise RuntimeError(f"GET /contacts answered {status}")
+        ids = [contact["id"] for contact in json.loads(body)["contacts"]]
+        if not ids:
+            raise RuntimeError("the book is empty; seed it first or drop --url")
+        cursors = {sort: await _cursors(connection, sort) for sort in LIST_SORTS}
+    finally:
+        connection.close()
+    # Numbers past the seeded range, so adds never collide
+    numbers = (synthetic_number(index) for index in itertools.count(10**8 + random.randrange(10**8)))
+    workload = Workload(ids, cursors, numbers, args.write_ratio)
+    results = []
+    for clients in args.clients:
+        for row in await run_level(host, port, workload, clients, args.duration, args.seed):
+            results.append(row)
+            print(_format(row), flush=True)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the address book HTTP API")
+    parser.add_argument("--url", help="test this running server instead of starting one")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32], help="concurrent clients per run")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per run")
+    parser.add_argument("--size", type=int, default=10000, help="contacts to seed the temporary book with")
+    parser.add_argument("--store", default="sqlite", help="temporary store kind: sqlite or sharded:N (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=8, help="server database worker threads")
+    parser.add_argument("--write-ratio", type=float, default=0.05, help="share of requests that add or edit")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        address = urlsplit(args.url)
+        results = asyncio.run(_load_test(address.hostname, address.port or 80, args))
+    else:
+        if args.store == "memory":
+            parser.error("a memory store cannot be shared with the server process")
+        with tempfile.TemporaryDirectory(prefix="addressbook-load-") as directory:
+            spec = store_spec(args.store, args.size, directory)
+            database.store_spec = spec
+            database.initialize_database()
+            contact_io.import_contacts(generate_contacts(args.size, seed=args.seed))
+            database.close_connections()
+            process, host, port = _start_server(spec, args.workers)
+            try:
+                results = asyncio.run(_load_test(host, port, args))
+            finally:
+                process.terminate()
+                process.wait()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump({"args": vars(args), "results": results}, fp, indent=2)
+        print(f"Wrote {len(results)} results to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,114 +1,605 @@
 import tkinter as tk
-import re
 import os
-from tkinter import messagebox, simpledialog, ttk
-from database import initialize_database, add_contact, get_all_contacts, update_contact, delete_contact, phone_exists
+import time
+import instrumentation
+import validation
+from concurrent.futures import ThreadPoolExecutor
+from instrumentation import instrumented
+from tkinter import messagebox, ttk
+from database import thread_connections, get_contact, get_contacts_page, iter_contacts, get_contacts_version, search_contacts, fuzzy_search_contacts, Contact, DuplicatePhoneError
+from service import ContactService
+from write_queue import WriteQueue
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "picture_logo", "picture_7.png")
+# Pre-scaled copies of the logo, named after the size and the source's mtime
+LOGO_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+class BackgroundSearch:
+    """Debounced queries on a worker thread, with results handed back to the Tk loop.
+
+    Each submit() supersedes the previous one: a pending debounce is dropped,
+    a queued query is cancelled and a running one is interrupted, so only the
+    latest request ever reaches its callback.
+    """
+
+    def __init__(self, root, delay_ms=150, poll_ms=15):
+        self.root = root
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+        self._worker_conns = []
+        self._after_id = None
+        self._future = None
+        self._generation = 0
+        self._started = 0.0
+
+    def submit(self, func, args, on_results):
+        self.cancel()
+        self._after_id = self.root.after(self.delay_ms, self._start, self._generation, func, args, on_results)
+
+    def cancel(self):
+        self._generation += 1
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if self._future is not None and not self._future.cancel():
+            for conn in self._worker_conns:
+                conn.interrupt()
+        self._future = None
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, func, args):
+        self._worker_conns = thread_connections()
+        return func(*args)
+
+    def _start(self, generation, func, args, on_results):
+        self._after_id = None
+        self._started = time.perf_counter()
+        self._future = self._executor.submit(self._run, func, args)
+        self._poll(generation, self._future, on_results)
+
+    def _poll(self, generation, future, on_results):
+        if generation != self._generation:
+            return  # superseded by a newer request
+        if not future.done():
+            self.root.after(self.poll_ms, self._poll, generation, future, on_results)
+            return
+        self._future = None
+        try:
+            results = future.result()
+        except Exception as e:
+            messagebox.showerror("Search Error", str(e))
+            return
+        if instrumentation.enabled():
+            # Worker time plus the wait for the next poll tick
+            instrumentation.record("ui.search_roundtrip", time.perf_counter() - self._started, len(results))
+        on_results(results)
+
+class PagedContactList:
+    """Sortable contact table that keeps only a sliding window of pages loaded.
+
+    Pages come from get_contacts_page() using keyset pagination. Scrolling near
+    either edge loads the neighbouring page and drops the one furthest away,
+    so at most `max_pages` pages live in the widget however large the book is.
+    Clicking a column heading re-sorts in the database.
+    """
+
+    COLUMNS = (
+        ("id", "ID", 50),
+        ("first", "First Name", 110),
+        ("last", "Last Name", 110),
+        ("address", "Address", 200),
+        ("number", "Contact Number", 110),
+    )
+
+    def __init__(self, parent, page_size=100, max_pages=3, selectmode="browse", height=12):
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.order_by = "id"
+        self.descending = False
+        self.pages = []
+        self._more_before = False
+        self._more_after = False
+        self._loading = False
+        self._fixed = None  # search results shown instead of pages
+        self._loaded_version = None
+        self._edges = None  # (first, last) of a window that deletes emptied, see remove_many()
+
+        self.frame = tk.Frame(parent, bg="#800000")
+        self.tree = ttk.Treeview(self.frame, columns=[key for key, _, _ in self.COLUMNS], show="headings", selectmode=selectmode, height=height)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        for key, title, width in self.COLUMNS:
+            self.tree.heading(key, text=title, command=lambda k=key: self.sort_by(k))
+            self.tree.column(key, width=width, anchor="w", stretch=(key != "id"))
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+
+        self.reload()
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def sort_by(self, key):
+        if key == self.order_by:
+            self.descending = not self.descending
+        else:
+            self.order_by, self.descending = key, False
+        for k, title, _ in self.COLUMNS:
+            arrow = (" \u25bc" if self.descending else " \u25b2") if k == self.order_by else ""
+            self.tree.heading(k, text=title + arrow)
+        if self._fixed is not None:
+            self.show_contacts(self._fixed)
+        else:
+            self.reload()
+
+    @instrumented("ui.list_show_contacts")
+    def show_contacts(self, contacts):
+        """Show a fixed list (e.g. search results) instead of paging through the table."""
+        key = self.order_by
+        self._fixed = sorted(contacts, key=lambda c: getattr(c, key).lower() if key != "id" else c.id, reverse=self.descending)
+        self.tree.delete(*self.tree.get_children())
+        self.pages = [self._fixed] if self._fixed else []
+        self._edges = None
+        self._more_before = self._more_after = False
+        self._insert(self._fixed, tk.END)
+
+    def remove(self, contact_id):
+        self.remove_many([contact_id])
+
+    def remove_many(self, contact_ids):
+        """Drop deleted contacts from the loaded pages without refetching.
+
+        If that empties the window, its old first and last rows stay behind as
+        the anchors the next page loads from: the delete may not have
+        committed yet, so fetching from the top could bring the rows back.
+        """
+        gone = set(contact_ids)
+        edges = (self.pages[0][0], self.pages[-1][-1]) if self.pages else self._edges
+        self.tree.delete(*[str(i) for i in gone if self.tree.exists(str(i))])
+        self.pages = [[c for c in page if c.id not in gone] for page in self.pages]
+        self.pages = [page for page in self.pages if page]
+        self._edges = None if self.pages else edges
+        if self._fixed is not None:
+            self._fixed = [c for c in self._fixed if c.id not in gone]
+
+    def update_rows(self, contacts):
+        """Redraw changed contacts in place (their position is kept until the next reload)."""
+        changed = {c.id: c for c in contacts}
+        for c in contacts:
+            if self.tree.exists(str(c.id)):
+                self.tree.item(str(c.id), values=c)
+        self.pages = [[changed.get(c.id, c) for c in page] for page in self.pages]
+        if self._fixed is not None:
+            self._fixed = [changed.get(c.id, c) for c in self._fixed]
+
+    def refresh(self):
+        """Back to paging from the top, skipping the reload if nothing changed since the last one."""
+        if self._fixed is not None or self._loaded_version != get_contacts_version():
+            self.reload()
+
+    @instrumented("ui.list_reload")
+    def reload(self):
+        self._loaded_version = get_contacts_version()
+        self.tree.delete(*self.tree.get_children())
+        self.pages = []
+        self._fixed = None
+        self._edges = None
+        page = self._fetch()
+        self._more_before = False
+        self._more_after = len(page) == self.page_size
+        if page:
+            self.pages.append(page)
+            self._insert(page, tk.END)
+
+    def _fetch(self, after=None, before=None):
+        return get_contacts_page(limit=self.page_size, after=after, before=before, order_by=self.order_by, descending=self.descending)
+
+    def _insert(self, contacts, index):
+        with instrumentation.timed("ui.list_insert_rows") as span:
+            for offset, c in enumerate(contacts):
+                position = index if index == tk.END else index + offset
+                self.tree.insert("", position, iid=str(c.id), values=c)
+            span.rows = len(contacts)
+
+    def _edge(self, last):
+        """The row the next page is loaded after (`last`) or before; None to start from the top."""
+        if self.pages:
+            return self.pages[-1][-1] if last else self.pages[0][0]
+        return self._edges and self._edges[1 if last else 0]
+
+    def _drop(self, page):
+        self.tree.delete(*[str(c.id) for c in page])
+
+    def _top_index(self):
+        return round(self.tree.yview()[0] * len(self.tree.get_children()))
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._loading:
+            return
+        if float(last) >= 0.9 and self._more_after:
+            self._loading = True
+            self.tree.after_idle(self._load_next)
+        elif float(first) <= 0.1 and self._more_before:
+            self._loading = True
+            self.tree.after_idle(self._load_previous)
+
+    def _load_next(self):
+        try:
+            if not self.tree.winfo_exists():
+                return
+            page = self._fetch(after=self._edge(last=True))
+            self._more_after = len(page) == self.page_size
+            if not page:
+                return
+            self._edges = None
+            self.pages.append(page)
+            self._insert(page, tk.END)
+            if len(self.pages) > self.max_pages:
+                top = self._top_index()
+                dropped = self.pages.pop(0)
+                self._drop(dropped)
+                self._more_before = True
+                self._scroll_to(top - len(dropped))
+        finally:
+            self._loading = False
+
+    def _load_previous(self):
+        try:
+            if not self.tree.winfo_exists():
+                return
+            page = self._fetch(before=self._edge(last=False))
+            self._more_before = len(page) == self.page_size
+            if not page:
+                return
+            self._edges = None
+            top = self._top_index()
+            self.pages.insert(0, page)
+            self._insert(page, 0)
+            if len(self.pages) > self.max_pages:
+                self._drop(self.pages.pop())
+                self._more_after = True
+            self._scroll_to(top + len(page))
+        finally:
+            self._loading = False
+
+    def _scroll_to(self, index):
+        total = len(self.tree.get_children())
+        if total:
+            self.tree.yview_moveto(max(index, 0) / total)
+
+    def selected_ids(self):
+        return [int(iid) for iid in self.tree.selection()]
+
+    def select_all(self):
+        """Select every loaded row (all current search results, or the pages in view)."""
+        self.tree.selection_set(self.tree.get_children())
+
+class ContactPicker:
+    """Search box over a PagedContactList that resolves the chosen rows to contact ids.
+
+    With an empty query the list pages through every contact; typing switches
+    it to matches from search_contacts(), run through the shared BackgroundSearch.
+    """
+
+    def __init__(self, parent, searcher, on_select=None, selectmode="browse", height=6, search_limit=200):
+        self.searcher = searcher
+        self.search_limit = search_limit
+        self.on_select = on_select
+        # Set by select_all_matching(): the selection stands for every match, loaded or not
+        self.all_matching = False
+
+        self.frame = tk.Frame(parent, bg="#800000")
+        bar = tk.Frame(self.frame, bg="#800000")
+        bar.pack(fill=tk.X)
+        tk.Label(bar, text="Find:", bg="#800000", fg="#FFD700").pack(side=tk.LEFT, padx=5)
+        self.query_var = tk.StringVar()
+        self.entry = tk.Entry(bar, textvariable=self.query_var)
+        self.entry.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5)
+
+        self.list = PagedContactList(self.frame, selectmode=selectmode, height=height)
+        self.list.pack(expand=True, fill=tk.BOTH, pady=(5, 0))
+
+        self.query_var.trace_add("write", lambda *_: self._on_query())
+        self.list.tree.bind("<Destroy>", lambda _e: self.searcher.cancel())
+        self.list.tree.bind("<<TreeviewSelect>>", lambda _e: self._on_selection())
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def _on_selection(self):
+        tree = self.list.tree
+        if self.all_matching and len(tree.selection()) != len(tree.get_children()):
+            self.all_matching = False  # rows were picked by hand since
+        if self.on_select is not None:
+            self.on_select(self.selected_ids())
+
+    def _on_query(self):
+        self.all_matching = False
+        query = self.query_var.get().strip()
+        if not query:
+            self.searcher.cancel()
+            self.list.reload()
+            return
+        self.searcher.submit(search_contacts, ("all fields", query, self.search_limit), self.list.show_contacts)
+
+    def reset(self):
+        """Clear the query and show the (refreshed) full list again."""
+        self.all_matching = False
+        if self.query_var.get():
+            self.query_var.set("")  # the trace reloads the list
+        else:
+            self.list.refresh()
+
+    def select_first(self):
+        children = self.list.tree.get_children()
+        if children:
+            self.list.tree.selection_set(children[0])
+            self.list.tree.focus(children[0])
+
+    def selected_ids(self):
+        return self.list.selected_ids()
+
+    def query(self):
+        return self.query_var.get().strip()
+
+    def refresh(self):
+        """Run the current query again (or page from the top when it is empty)."""
+        self._on_query()
+
+    def select_all_matching(self):
+        """Select the loaded rows, standing for every contact the query matches (all of them when empty)."""
+        self.list.select_all()
+        self.all_matching = True
+
+    def matching_ids(self):
+        """Ids of every contact the query matches, beyond the loaded pages and the search limit."""
+        query = self.query()
+        if not query:
+            return [c.id for c in iter_contacts()]
+        return [c.id for c in search_contacts("all fields", query)]
 
 class AddressBook:
-    def __init__(self):
-        initialize_database()
-        self.contacts = get_all_contacts()
-        self.max_entries = 100
+    def __init__(self, max_entries=None, fuzzy_limit=20):
+        self._started = time.perf_counter()
+        self.startup_times = {}
+        self._on_ready = None
+
+        # None means unbounded; contacts are never all loaded into the GUI
+        self.service = ContactService(max_entries=max_entries)
+        self.search_limit = 200
+        self.fuzzy_limit = fuzzy_limit  # top-k for fuzzy search
 
         self.root = tk.Tk()
         self.root.title("Group 4 Address Book")
-        self.root.geometry("600x400")
+        self.root.geometry("700x520")
         self.root.configure(bg="#800000")  # Maroon background
 
-        # Logo image
-        self.logo_original = None
+        # Logo image, loaded after the window is up (see _after_first_paint)
         self.logo_image = None
-        self._load_logo()
-        # Pre-scale to fit nicely above buttons
-        if self.logo_original is not None:
-            self.logo_image = self._get_scaled_logo(max_width=500, max_height=120)
 
         # Style for buttons
         style = ttk.Style()
         style.configure("TButton", background="#FFD700", foreground="#800000", font=("Arial", 10, "bold"))
+        style.configure("Treeview", background="#FFD700", fieldbackground="#FFD700", foreground="#800000", font=("Arial", 10))
+        style.configure("Treeview.Heading", font=("Arial", 10, "bold"))
+
+        # Status line for saves that finish after the screen has moved on
+        self.status_var = tk.StringVar()
+        tk.Label(self.root, textvariable=self.status_var, bg="#800000", fg="#FFD700", anchor="w").pack(side=tk.BOTTOM, fill=tk.X, padx=10)
 
         # Main Frame
         self.content_frame = tk.Frame(self.root, bg="#800000")
         self.content_frame.pack(expand=True, fill=tk.BOTH)
 
-        # Menu
-        self.show_home()
+        # Keystroke searches run off the Tk thread
+        self.searcher = BackgroundSearch(self.root)
+
+        # Writes are committed by one background thread; the Tk loop only polls for the outcome
+        self.writer = WriteQueue()
+        self._pending_writes = 0
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_app)
 
         # Phone number validation (digits only, max 11)
         self._phone_vcmd = (self.root.register(self._phone_validate), "%P")
 
-    def clear_content(self):
-        for child in self.content_frame.winfo_children():
-            child.destroy()
+        # Screens are built on first visit and then only hidden and shown again
+        self.screens = {}
+        self.current_screen = None
 
-    def _load_logo(self):
-        candidates = [
-            os.path.join(os.path.dirname(__file__), "picture_logo", "picture_7.png"),
-        ]
-        for path in candidates:
+        # Menu
+        self.show_home()
+        # An idle callback would run in the same pass that maps the window, before
+        # anything is drawn; wait for the window system to ask for the first frame
+        self._first_expose = self.root.bind("<Expose>", self._on_first_expose, add="+")
+
+    def _on_first_expose(self, _event):
+        self.root.unbind("<Expose>", self._first_expose)
+        # The timer runs once the rest of this batch of Expose events is handled
+        self.root.after(0, self._after_first_paint)
+
+    def _after_first_paint(self):
+        """Finish starting up once the window is on screen: open the database and load the logo."""
+        # Tk redraws from idle callbacks the Expose events queued; draw before the slow work below
+        self.root.update_idletasks()
+        self._startup_mark("first_paint")
+        self.status_var.set("Opening address book...")
+
+        # Migrations can take a while on an old book; run them off the Tk thread
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="startup")
+        future = executor.submit(self.service.initialize)
+        executor.shutdown(wait=False)
+
+        # Decoded while the database opens
+        self.logo_image = self._load_logo(max_width=500, max_height=120)
+        if self.logo_image is not None:
+            self.title_label.configure(image=self.logo_image)
+        self._startup_mark("logo")
+        self._poll_startup(future)
+
+    def _poll_startup(self, future):
+        if not future.done():
+            self.root.after(15, self._poll_startup, future)
+            return
+        try:
+            future.result()
+        except Exception as e:
+            messagebox.showerror("Database Error", str(e))
+            self.exit_app()
+            return
+        for button in self.nav_buttons:
+            button.configure(state=tk.NORMAL)
+        self.status_var.set("")
+        self._startup_mark("ready")
+        if self._on_ready is not None:
+            self._on_ready()
+
+    def _startup_mark(self, name):
+        elapsed = time.perf_counter() - self._started
+        self.startup_times[name] = elapsed
+        if instrumentation.enabled():
+            instrumentation.record(f"ui.startup_{name}", elapsed)
+
+    def _write(self, func, args, on_success=None, on_error=None):
+        """Queue a write; the callback runs on the Tk thread once it has committed or failed."""
+        future = self.writer.submit(func, *args)
+        self._pending_writes += 1
+        self.status_var.set(f"Saving {self._pending_writes} change(s)...")
+        self._poll_write(future, on_success, on_error)
+
+    def _poll_write(self, future, on_success, on_error):
+        if not future.done():
+            self.root.after(15, self._poll_write, future, on_success, on_error)
+            return
+        self._pending_writes -= 1
+        self.status_var.set(f"Saving {self._pending_writes} change(s)..." if self._pending_writes else "All changes saved.")
+        try:
+            result = future.result()
+        except Exception as e:
+            if on_error is not None:
+                on_error(e)
+            else:
+                messagebox.showerror("Error", str(e))
+            return
+        if on_success is not None:
+            on_success(result)
+
+    def _save_failed(self, title, message, screen, has_input, reopen):
+        """Report a background save that failed and bring its form back with what was typed.
+
+        The form reopens straight away if the user is on the home screen, or on
+        that form with nothing new in it. Anywhere else reopening would pull
+        them away from (or overwrite) what they are doing now, so the error
+        dialog asks first.
+        """
+        on_home = self.current_screen is self.screens["home"][0]
+        on_form = screen in self.screens and self.current_screen is self.screens[screen][0]
+        if on_home or (on_form and not has_input()):
+            messagebox.showerror(title, message)
+            reopen()
+            return
+        question = "Reopen the form with what you typed?"
+        if on_form:
+            question += " This replaces what is in it now."
+        if messagebox.askyesno(title, f"{message}\n\n{question}", icon=messagebox.ERROR):
+            reopen()
+        else:
+            self.status_var.set(f"Not saved: {message}")
+
+    def _show_screen(self, name, build, *args):
+        """Switch to screen `name`, building its widgets the first time only.
+
+        `build(frame)` fills a new frame and returns the function that resets
+        the screen each time it is shown; it is called with `args`.
+        """
+        screen = self.screens.get(name)
+        if screen is None:
+            frame = tk.Frame(self.content_frame, bg="#800000")
+            screen = self.screens[name] = (frame, build(frame))
+        frame, on_show = screen
+        # Whatever the previous screen was searching for is no longer wanted
+        self.searcher.cancel()
+        if self.current_screen is not frame:
+            if self.current_screen is not None:
+                self.current_screen.pack_forget()
+            frame.pack(expand=True, fill=tk.BOTH)
+            self.current_screen = frame
+        on_show(*args)
+
+    def _load_logo(self, max_width: int, max_height: int):
+        """The logo scaled to fit, read from a small cached copy when the source has not changed."""
+        try:
+            mtime = os.stat(LOGO_PATH).st_mtime_ns
+        except OSError:
+            return None
+        prefix = f"logo_{max_width}x{max_height}_"
+        cached = os.path.join(LOGO_CACHE_DIR, f"{prefix}{mtime}.png")
+        if os.path.exists(cached):
             try:
-                if os.path.exists(path):
-                    self.logo_original = tk.PhotoImage(file=path, master=self.root)
-                    return
-            except Exception:
-                continue
-        self.logo_original = None
+                return tk.PhotoImage(file=cached, master=self.root)
+            except tk.TclError:
+                pass  # unreadable cache file; rebuild it below
 
-    def _get_scaled_logo(self, max_width: int, max_height: int):
-        if self.logo_original is None:
+        try:
+            original = tk.PhotoImage(file=LOGO_PATH, master=self.root)
+        except tk.TclError:
             return None
-        w, h = self.logo_original.width(), self.logo_original.height()
+        scaled = self._scale_image(original, max_width, max_height)
+        try:
+            os.makedirs(LOGO_CACHE_DIR, exist_ok=True)
+            for name in os.listdir(LOGO_CACHE_DIR):
+                if name.startswith(prefix):
+                    os.remove(os.path.join(LOGO_CACHE_DIR, name))  # scaled from an older logo
+            scaled.write(cached, format="png")
+        except (OSError, tk.TclError):
+            pass  # read-only install: scale on every start instead
+        return scaled
+
+    @staticmethod
+    def _scale_image(image, max_width: int, max_height: int):
+        w, h = image.width(), image.height()
         if w <= max_width and h <= max_height:
-            return self.logo_original
+            return image
         fw = (w + max_width - 1) // max_width
         fh = (h + max_height - 1) // max_height
         factor = max(fw, fh)
         try:
-            return self.logo_original.subsample(factor, factor)
+            return image.subsample(factor, factor)
         except Exception:
-            return self.logo_original
+            return image
 
+    @instrumented("ui.show_home")
     def show_home(self):
-        self.clear_content()
+        self._show_screen("home", self._build_home)
 
-        if self.logo_image is not None:
-            title_label = tk.Label(self.content_frame, image=self.logo_image, bg="#800000")
-            title_label.pack(expand=True, pady=10)
-        else:
-            title_label = tk.Label(self.content_frame, text="Address Book", font=("Arial", 20, "bold"), bg="#800000", fg="#FFD700",)
-            title_label.pack(expand=True, pady=10)
+    def _build_home(self, frame):
+        # Text until the logo has loaded
+        self.title_label = tk.Label(frame, text="Address Book", font=("Arial", 20, "bold"), bg="#800000", fg="#FFD700")
+        self.title_label.pack(expand=True, pady=10)
 
-        button_frame = tk.Frame(self.content_frame, bg="#800000")
+        button_frame = tk.Frame(frame, bg="#800000")
         button_frame.pack(expand=True, pady=10)
 
-        ttk.Button(button_frame, text="Add Contact", command=self.add_contact).pack(pady=5)
-        ttk.Button(button_frame, text="Edit Contact", command=self.edit_contact).pack(pady=5)
-        ttk.Button(button_frame, text="Delete Contact", command=self.delete_contact).pack(pady=5)
-        ttk.Button(button_frame, text="View Contacts", command=self.view_contacts).pack(pady=5)
-        ttk.Button(button_frame, text="Search Contacts", command=self.search_contacts).pack(pady=5)
+        # Disabled until the database is open
+        self.nav_buttons = [
+            ttk.Button(button_frame, text="Add Contact", command=self.add_contact),
+            ttk.Button(button_frame, text="Edit Contact", command=self.edit_contact),
+            ttk.Button(button_frame, text="Delete Contact", command=self.delete_contact),
+            ttk.Button(button_frame, text="View Contacts", command=self.view_contacts),
+            ttk.Button(button_frame, text="Search Contacts", command=self.search_contacts),
+        ]
+        if instrumentation.enabled():
+            self.nav_buttons.append(ttk.Button(button_frame, text="Diagnostics", command=self.show_diagnostics))
+        for button in self.nav_buttons:
+            button.configure(state=tk.DISABLED)
+            button.pack(pady=5)
         ttk.Button(button_frame, text="Exit", command=self.exit_app).pack(pady=20)
+        return lambda: None
 
-    def validate_name(self, name):
-        """Validate name: not empy, only letters and spaces."""
-        if not name.strip():
-            return False, "Name cannot be empty."
-        if not re.match(r"^[a-zA-Z\s]+$", name):
-            return False, "Name must contain only letters and spaces."
-        return True, ""
-        
-    def validate_address(self, address):
-        """validate address: not empty."""
-        if not address.strip():
-            return False, "Address cannot be empty."
-        return True, ""
-        
-    def validate_number(self, number):
-        """Validate contact number: exactly 11 digits."""
-        cleaned = self._sanitize_number(number)
-        if len(cleaned) != 11:
-            return False, "Contact number must be exactly 11 digits."
-        return True, ""
-    
     def _phone_validate(self, proposed: str) -> bool:
         """Validate phone number input"""
         if proposed == "":
@@ -116,18 +607,18 @@ class AddressBook:
         return proposed.isdigit() and len(proposed) <= 11
 
     def _sanitize_number(self, number: str) -> str:
-        """Digits only, storage and dispaly consistency"""
-        return re.sub(r"[^\d]", "", number)[:11]   
+        return validation.sanitize_number(number)
 
-    def add_contact(self):
-        if len(self.contacts) >= self.max_entries:
-            messagebox.showerror("Error", "Address book is full (max 100 entries).")
+    @instrumented("ui.add_contact")
+    def add_contact(self, prefill=None):
+        if self.service.max_entries is not None and self.service.count() >= self.service.max_entries:
+            messagebox.showerror("Error", f"Address book is full (max {self.service.max_entries} entries).")
             return
-        
-        self.clear_content()
+        self._show_screen("add", self._build_add, prefill)
 
+    def _build_add(self, frame):
         # Center everything inside a dedicated wrapper that still lets the parent use pack
-        wrapper = tk.Frame(self.content_frame, bg="#800000")
+        wrapper = tk.Frame(frame, bg="#800000")
         wrapper.pack(expand=True, fill=tk.BOTH)
 
         center = tk.Frame(wrapper, bg="#800000")
@@ -155,254 +646,330 @@ class AddressBook:
         number_entry.configure(validatecommand=self._phone_vcmd)
         number_entry.grid(row=3, column=1, padx=5, pady=5)
 
+        entries = (first_entry, last_entry, address_entry, number_entry)
+
+        def on_show(prefill=None):
+            # A save that failed in the background reopens the form with what was typed
+            for entry, value in zip(entries, prefill or ("", "", "", "")):
+                entry.delete(0, tk.END)
+                entry.insert(0, value)
+            first_entry.focus_set()
+
+        def failed(values, error):
+            if isinstance(error, DuplicatePhoneError):
+                title, message = "Duplicate Number", "A contact number already exists."
+            else:
+                title, message = "Error", str(error)
+            self._save_failed(title, message, "add", lambda: any(entry.get() for entry in entries),
+                              lambda: self.add_contact(prefill=values))
+
         def submit():
-            first = first_entry.get()
-            last = last_entry.get()
-            address = address_entry.get()
-            number = number_entry.get()
-            sanitized_number = self._sanitize_number(number)
-
-            # Validation
-            valid_first, msg_first = self.validate_name(first)
-            valid_last, msg_last = self.validate_name(last)
-            valid_address, msg_address = self.validate_address(address)
-            valid_number, msg_number = self.validate_number(sanitized_number)
-
-            if not (valid_first and valid_last and valid_address and valid_number):
-                error_msg = ""
-                if not valid_first: error_msg += msg_first + "\n"
-                if not valid_last: error_msg += msg_last + "\n"
-                if not valid_address: error_msg += msg_address + "\n"
-                if not valid_number: error_msg += msg_number + "\n"
-                messagebox.showerror("Validation Error", error_msg)
-                return
-            
-            if phone_exists(sanitized_number):
-                messagebox.showerror("Duplicate Number", "A contact number already exists.")
+            values = tuple(entry.get() for entry in entries)
+            errors = validation.validate_contact(*values)
+            if errors:
+                messagebox.showerror("Validation Error", "\n".join(errors))
                 return
-                
-            add_contact(first.strip().title(), last.strip().title(), address.strip().title(), sanitized_number)
-            self.contacts = get_all_contacts()
-            messagebox.showinfo("Success", "Contact added successfully.")
+            # Optimistic: leave the form now, the writer reports back when it has committed
+            self._write(self.service.add, values,
+                        on_success=lambda c: self.status_var.set(f"Contact {c.first} {c.last} added successfully."),
+                        on_error=lambda e: failed(values, e))
             self.show_home()
 
         action_frame = tk.Frame(center, bg="#800000")
         action_frame.pack(pady=20)
         ttk.Button(action_frame, text="Add", command=submit).pack(side=tk.LEFT, padx=8)
         ttk.Button(action_frame, text="Back", command=self.show_home).pack(side=tk.LEFT, padx=8)
+        return on_show
 
-    def edit_contact(self):
-        if not self.contacts:
+    @instrumented("ui.edit_contact")
+    def edit_contact(self, prefill=None):
+        if not self.service.has_contacts():
             messagebox.showerror("Error", "No contacts to edit.")
             return
-        
-        self.clear_content()
+        self._show_screen("edit", self._build_edit, prefill)
 
-        wrapper = tk.Frame(self.content_frame, bg="#800000")
+    def _build_edit(self, frame):
+        wrapper = tk.Frame(frame, bg="#800000")
         wrapper.pack(expand=True, fill=tk.BOTH)
 
         center = tk.Frame(wrapper, bg="#800000")
         center.pack(expand=True)
-    
-        tk.Label(center, text="Edit Contact", font=("Arial", 16, "bold"), bg="#800000", fg="#FFD700").pack(pady=20)
-
-        # Contact Selection
-        select_frame = tk.Frame(center, bg="#800000")
-        select_frame.pack(pady=8)
 
-        tk.Label(select_frame, text= "Select Contact:", bg="#800000", fg="#FFD700").grid(row=0, column=0, padx=5, pady=5)
-        options = [f"{i+1}. {c['first']} {c['last']}" for i, c in enumerate(self.contacts)]
-        selected_label = tk.StringVar(value=options[0])
-        combo = ttk.Combobox(select_frame, textvariable=selected_label, values=options, state="readonly")
-        combo.grid(row=0, column=1, padx=5, pady=5)
+        tk.Label(center, text="Edit Contact", font=("Arial", 16, "bold"), bg="#800000", fg="#FFD700").pack(pady=10)
 
         # Prefilled Form
         form_frame = tk.Frame(center, bg="#800000")
-        form_frame.pack(pady=10)
 
         tk.Label(form_frame, text="First Name:", bg="#800000", fg="#FFD700").grid(row=0, column=0, sticky="e", padx=5, pady=5)
         first_entry = tk.Entry(form_frame)
         first_entry.grid(row=0, column=1, padx=5, pady=5)
 
-        tk.Label(form_frame, text="Last Name:", bg="#800000", fg="#FFD700").grid(row=1, column=0, sticky="e", padx=5, pady=5)
+        tk.Label(form_frame, text="Last Name:", bg="#800000", fg="#FFD700").grid(row=0, column=2, sticky="e", padx=5, pady=5)
         last_entry = tk.Entry(form_frame)
-        last_entry.grid(row=1, column=1, padx=5, pady=5)
+        last_entry.grid(row=0, column=3, padx=5, pady=5)
 
-        tk.Label(form_frame, text="Address:", bg="#800000", fg="#FFD700").grid(row=2, column=0, sticky="e", padx=5, pady=5)
+        tk.Label(form_frame, text="Address:", bg="#800000", fg="#FFD700").grid(row=1, column=0, sticky="e", padx=5, pady=5)
         address_entry = tk.Entry(form_frame)
-        address_entry.grid(row=2, column=1, padx=5, pady=5)
+        address_entry.grid(row=1, column=1, padx=5, pady=5)
 
-        tk.Label(form_frame, text="Contact Number:", bg="#800000", fg="#FFD700").grid(row=3, column=0, sticky="e", padx=5, pady=5)
+        tk.Label(form_frame, text="Contact Number:", bg="#800000", fg="#FFD700").grid(row=1, column=2, sticky="e", padx=5, pady=5)
         number_entry = tk.Entry(form_frame, validate="key")
         number_entry.configure(validatecommand=self._phone_vcmd)
-        number_entry.grid(row=3, column=1, padx=5, pady=5)
+        number_entry.grid(row=1, column=3, padx=5, pady=5)
 
-        # Initial form with first contact
-        def populate_form(index):
-            contact = self.contacts[index]
+        def populate_form(contact):
             first_entry.delete(0, tk.END)
-            first_entry.insert(0, contact["first"])
+            first_entry.insert(0, contact.first)
             last_entry.delete(0, tk.END)
-            last_entry.insert(0, contact["last"])
+            last_entry.insert(0, contact.last)
             address_entry.delete(0, tk.END)
-            address_entry.insert(0, contact["address"])
+            address_entry.insert(0, contact.address)
             number_entry.delete(0, tk.END)
 
-            # sanitize to digits only and cap at 11 for editing
-            sanitized = self._sanitize_number(contact["number"])
-            number_entry.insert(0, sanitized)
+            # digits only and capped at 11, or the key validator rejects the insert
+            number_entry.insert(0, self._sanitize_number(contact.number))
 
-        current_index = 0
-        populate_form(current_index)
+        def clear_form():
+            for entry in (first_entry, last_entry, address_entry, number_entry):
+                entry.delete(0, tk.END)
 
-        def on_select(_event):
-            nonlocal current_index
-            label = selected_label.get()
-            try:
-                current_index = options.index(label)
-            except ValueError:
-                current_index = 0
-            populate_form(current_index)
+        current_ids = []
+        bulk_hint = tk.Label(center, text="", bg="#800000", fg="#FFD700")
 
-        combo.bind("<<ComboboxSelected>>", on_select)
+        def on_select(ids):
+            nonlocal current_ids
+            contacts = [c for c in map(get_contact, ids) if c is not None]
+            if not contacts:
+                return
+            current_ids = [c.id for c in contacts]
+            number_entry.configure(state=tk.NORMAL)
+            if len(contacts) == 1:
+                bulk_hint.configure(text="")
+                populate_form(contacts[0])
+                return
+            # Several contacts: blank fields keep each contact's own value; numbers are unique so stay untouched
+            clear_form()
+            number_entry.configure(state=tk.DISABLED)
+            bulk_hint.configure(text=f"Editing {len(contacts)} contacts: fields left blank are not changed.")
+
+        # Contact Selection: searchable list that resolves to contact ids (Shift/Ctrl-click selects several)
+        picker = ContactPicker(center, self.searcher, on_select=on_select, selectmode="extended", height=6, search_limit=self.search_limit)
+        picker.pack(fill=tk.X, padx=10)
+        bulk_hint.pack()
+        form_frame.pack(pady=10)
 
-        def submit():
-            contact = self.contacts[current_index]
-            first = first_entry.get()
-            last = last_entry.get()
-            address = address_entry.get()
-            number = number_entry.get()
-            sanitized_number = self._sanitize_number(number)
-
-            # validation
-            valid_first, msg_first = self.validate_name(first)
-            valid_last, msg_last = self.validate_name(last)
-            valid_address, msg_address = self.validate_address(address)
-            valid_number, msg_number = self.validate_number(sanitized_number)
-
-            if not (valid_first and valid_last and valid_address and valid_number):
-                error_msg = ""
-                if not valid_first: error_msg += msg_first + "\n"
-                if not valid_last: error_msg += msg_last + "\n"
-                if not valid_address: error_msg += msg_address + "\n"
-                if not valid_number: error_msg += msg_number + "\n"
-                messagebox.showerror("Validation Error", error_msg)
+        def on_show(prefill=None):
+            nonlocal current_ids
+            current_ids = []
+            number_entry.configure(state=tk.NORMAL)
+            bulk_hint.configure(text="")
+            clear_form()
+            picker.reset()
+            if prefill is None:
+                picker.select_first()
                 return
-            
-            # Prevent assigning duplicate contact number
-            if phone_exists(sanitized_number, exclude_id=contact["id"]):
-                messagebox.showerror("Duplicate Number", "Another contact already uses this contact number.")
+            # A save that failed in the background reopens the contact with what was typed;
+            # it is listed but not selected, since selecting would refill the stored values
+            contact, values = prefill
+            picker.list.show_contacts([contact])
+            current_ids = [contact.id]
+            for entry, value in zip((first_entry, last_entry, address_entry, number_entry), values):
+                entry.insert(0, value)
+            first_entry.focus_set()
+
+        def submit_many():
+            fields = (first_entry.get() or None, last_entry.get() or None, address_entry.get() or None)
+            originals = [c for c in map(get_contact, current_ids) if c is not None]
+            # Validate here so the rows can be redrawn right away, before the writer commits
+            predicted = []
+            for c in originals:
+                row, errors = validation.check_contact(*(old if new is None else new for new, old in zip(fields + (None,), c[1:])))
+                if errors:
+                    messagebox.showerror("Validation Error", f"Contact {c.id}: " + "\n".join(errors))
+                    return
+                predicted.append(Contact(c.id, *row))
+            picker.list.update_rows(predicted)
+
+            def failed(error):
+                messagebox.showerror("Error", str(error))
+                picker.list.update_rows(originals)
+
+            rows = [(c.id,) + fields + (None,) for c in originals]
+            self._write(self.service.update_many, (rows,),
+                        on_success=lambda count: self.status_var.set(f"{count} contacts edited successfully."),
+                        on_error=failed)
+
+        def has_input():
+            # Typed changes not saved yet: fields that differ from the selected contact
+            values = (first_entry.get(), last_entry.get(), address_entry.get(), number_entry.get())
+            if len(current_ids) > 1:
+                return any(values[:3])
+            contact = get_contact(current_ids[0]) if current_ids else None
+            if contact is None:
+                return any(values)
+            return values != (contact.first, contact.last, contact.address, self._sanitize_number(contact.number))
+
+        def failed(contact_id, values, error):
+            if isinstance(error, DuplicatePhoneError):
+                # Enforced by the unique index on phone_number
+                title, message = "Duplicate Number", "Another contact already uses this contact number."
+            else:
+                title, message = "Error", str(error)
+            contact = get_contact(contact_id)
+            if contact is None:
+                messagebox.showerror(title, message)
                 return
+            self._save_failed(title, message, "edit", has_input, lambda: self.edit_contact(prefill=(contact, values)))
 
-            update_contact(contact["id"], first.strip().title(), last.strip().title(), address.strip().title(), sanitized_number)
-            self.contacts = get_all_contacts()
-            messagebox.showinfo("Success", "Contact edited successfully.")
+        def submit():
+            if not current_ids:
+                messagebox.showerror("Error", "Select a contact to edit.")
+                return
+            if len(current_ids) > 1:
+                submit_many()
+                return
+            values = (first_entry.get(), last_entry.get(), address_entry.get(), number_entry.get())
+            errors = validation.validate_contact(*values)
+            if errors:
+                messagebox.showerror("Validation Error", "\n".join(errors))
+                return
+            contact_id = current_ids[0]
+            self._write(self.service.update, (contact_id,) + values,
+                        on_success=lambda c: self.status_var.set(f"Contact {c.first} {c.last} edited successfully."),
+                        on_error=lambda e: failed(contact_id, values, e))
             self.show_home()
 
         action_frame = tk.Frame(center, bg="#800000")
-        action_frame.pack(pady=16)
+        action_frame.pack(pady=10)
         ttk.Button(action_frame, text="Save", command=submit).pack(side=tk.LEFT, padx=8)
         ttk.Button(action_frame, text="Back", command=self.show_home).pack(side=tk.LEFT, padx=8)
+        return on_show
 
+    @instrumented("ui.delete_contact")
     def delete_contact(self):
-        if not self.contacts:
+        if not self.service.has_contacts():
             messagebox.showerror("Error", "No contacts to delete.")
             return
+        self._show_screen("delete", self._build_delete)
 
-        num = simpledialog.askinteger("Delete Contact", f"Enter entry number to delete (1-{len(self.contacts)}):")
-        if num is None or not (1 <= num <= len(self.contacts)):
-            messagebox.showerror("Error", "Invalid entry number.")
-            return
-        
-        contact = self.contacts[num-1]
-        confirm = messagebox.askyesno("Confirm Delete", f"Delete contact: {contact['first']} {contact['last']}?")
-        if confirm:
-            contact_id = contact.get("id")
-            if contact_id is not None:
-                delete_contact(contact_id)
-                self.contacts = get_all_contacts()
-                messagebox.showinfo("Success", "Contact deleted successfully.")
+    def _build_delete(self, frame):
+        tk.Label(frame, text="Delete Contact", font=("Arial", 16, "bold"), bg="#800000", fg="#FFD700").pack(pady=10)
+
+        # Shift/Ctrl-click marks several contacts, deleted in one transaction; Select All
+        # stands for every contact matching the query, not just the rows loaded in the list
+        picker = ContactPicker(frame, self.searcher, selectmode="extended", search_limit=self.search_limit)
+        picker.pack(expand=True, fill=tk.BOTH, padx=10)
+
+        def submit():
+            if picker.all_matching:
+                ids, query = picker.matching_ids(), picker.query()
+                if not ids:
+                    messagebox.showerror("Error", "No contacts match the query.")
+                    return
+                prompt = f"Delete all {len(ids)} contacts matching '{query}'?" if query else f"Delete all {len(ids)} contacts?"
+                if not messagebox.askyesno("Confirm Delete", prompt):
+                    return
+                delete(ids, reload=True)
+                return
+
+            ids = picker.selected_ids()
+            contact = get_contact(ids[0]) if ids else None
+            if contact is None:
+                messagebox.showerror("Error", "Select a contact to delete.")
+                return
+
+            if len(ids) == 1:
+                confirm = messagebox.askyesno("Confirm Delete", f"Delete contact: {contact.first} {contact.last}?")
             else:
-                messagebox.showerror("Error", "Cannot delete: missing contact ID. Try viewing contacts and deleting again.")
+                confirm = messagebox.askyesno("Confirm Delete", f"Delete {len(ids)} selected contacts?")
+            if not confirm:
+                return
+            delete(ids)
 
-    def view_contacts(self):
-        self.clear_content()
+        def delete(ids, reload=False):
+            # Optimistic: the rows disappear now and come back if the delete fails
+            picker.all_matching = False
+            picker.list.remove_many(ids)
 
-        tk.Label(self.content_frame, text="View Contacts", font=("Arial", 16, "bold"), bg="#800000", fg="#FFD700").pack(pady=10)
+            def failed(error):
+                messagebox.showerror("Error", str(error))
+                picker.refresh()
 
-        # Scrollable text area
-        text_frame = tk.Frame(self.content_frame, bg="#800000")
-        text_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 5))
+            def deleted(count):
+                self.status_var.set("Contact deleted successfully." if count == 1 else f"{count} contacts deleted successfully.")
+                if reload:
+                    picker.refresh()  # rows past the loaded pages may have been paged in before the commit
 
-        scrollbar = tk.Scrollbar(text_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            self._write(self.service.delete_many, (ids,), on_success=deleted, on_error=failed)
 
-        text = tk.Text(text_frame, bg="#FFD700", fg="#800000", font=("Arial", 10), height=15, yscrollcommand=scrollbar.set)
-        text.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+        action_frame = tk.Frame(frame, bg="#800000")
+        action_frame.pack(pady=10)
+        ttk.Button(action_frame, text="Delete", command=submit).pack(side=tk.LEFT, padx=8)
+        ttk.Button(action_frame, text="Select All", command=picker.select_all_matching).pack(side=tk.LEFT, padx=8)
+        ttk.Button(action_frame, text="Back", command=self.show_home).pack(side=tk.LEFT, padx=8)
+        return picker.reset
 
-        scrollbar.config(command=text.yview)
+    @instrumented("ui.view_contacts")
+    def view_contacts(self):
+        self._show_screen("view", self._build_view)
 
-        self.contacts = get_all_contacts()
+    def _build_view(self, frame):
+        tk.Label(frame, text="View Contacts", font=("Arial", 16, "bold"), bg="#800000", fg="#FFD700").pack(pady=10)
 
-        if not self.contacts:
-            text.insert(tk.END, "No contacts in the address book.")
-        else:
-            for i, contact in enumerate(self.contacts, 1):
-                sanitized = self._sanitize_number(contact["number"])
-                text.insert(tk.END, f"{i}. Name: {contact['first'].title()} {contact['last'].title()}\n Address: {contact['address'].title()}\n Number: {sanitized}\n\n")
-            
-        text.config(state=tk.DISABLED)
-
-        ttk.Button(self.content_frame, text="Back", command=self.show_home).pack(pady=10)
-    
+        # Only a window of rows is loaded; scrolling fetches the next page
+        contact_list = PagedContactList(frame)
+        contact_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 5))
+
+        empty_label = tk.Label(frame, text="No contacts in the address book.", bg="#800000", fg="#FFD700")
+        back_button = ttk.Button(frame, text="Back", command=self.show_home)
+        back_button.pack(pady=10)
+
+        def on_show():
+            # Reloads only if contacts changed since the screen was last shown
+            contact_list.refresh()
+            if contact_list.pages:
+                empty_label.pack_forget()
+            else:
+                empty_label.pack(before=back_button)
+
+        return on_show
+
+    @instrumented("ui.search_contacts")
     def search_contacts(self):
-        if not self.contacts:
+        if not self.service.has_contacts():
             messagebox.showerror("Error", "No contacts to search.")
             return
-        
-        self.clear_content()
+        self._show_screen("search", self._build_search)
 
-        tk.Label(self.content_frame, text="Search Contacts", font=("Arial", 16, "bold"), bg="#800000", fg="#FFD700").pack(pady=10)
+    def _build_search(self, frame):
+        tk.Label(frame, text="Search Contacts", font=("Arial", 16, "bold"), bg="#800000", fg="#FFD700").pack(pady=10)
 
-        controls = tk.Frame(self.content_frame, bg="#800000")
+        controls = tk.Frame(frame, bg="#800000")
         controls.pack(pady=5)
 
         tk.Label(controls, text="Search by:", bg="#800000", fg="#FFD700").grid(row=0, column=0, padx=5, pady=5, sticky="e")
         search_type = tk.StringVar(value="first name")
-        stype_combo = ttk.Combobox(controls, textvariable=search_type, values=["first name", "last name", "address", "contact number"], state="readonly")
+        stype_combo = ttk.Combobox(controls, textvariable=search_type, values=["first name", "last name", "address", "contact number", "all fields"], state="readonly")
         stype_combo.grid(row=0, column=1, padx=5, pady=5)
 
         tk.Label(controls, text="Query:", bg="#800000", fg="#FFD700").grid(row=0, column=2, padx=5, pady=5, sticky="e")
         query_var = tk.StringVar()
         query_entry = tk.Entry(controls, textvariable=query_var)
         query_entry.grid(row=0, column=3, padx=5, pady=5)
-        query_entry.focus_set()
 
-        results_text = tk.Text(self.content_frame, bg="#FFD700", fg="#800000", font=("Arial", 10), height=15)
+        # Ranked matches that tolerate misspellings and sound-alike names
+        fuzzy_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(controls, text="Fuzzy", variable=fuzzy_var, command=lambda: update_results(),
+                       bg="#800000", fg="#FFD700", selectcolor="#800000", activebackground="#800000").grid(row=0, column=4, padx=5)
+
+        results_text = tk.Text(frame, bg="#FFD700", fg="#800000", font=("Arial", 10), height=15)
         results_text.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
         results_text.config(state=tk.DISABLED)
 
-        def update_results():
-            stype = search_type.get()
-            query = query_var.get().strip().lower()
-            query_digits = self._sanitize_number(query)
-            
-            self.contacts = get_all_contacts()
-            
-            results = []
-            if query:
-                for i, contact in enumerate(self.contacts, 1):
-                    if stype == "first name" and query in contact["first"].lower():
-                        results.append((i, contact))
-                    elif stype == "last name" and query in contact["last"].lower():
-                        results.append((i, contact))
-                    elif stype == "address" and query in contact["address"].lower():
-                        results.append((i, contact))
-                    elif stype == "contact number":
-                        sanitized = self._sanitize_number(contact["number"])
-                        if query_digits and query_digits in sanitized:
-                            results.append((i, contact))
-                
+        last_state = None
+
+        @instrumented("ui.render_search_results")
+        def show_results(query, results, limit):
             results_text.config(state=tk.NORMAL)
             results_text.delete("1.0", tk.END)
 
@@ -411,22 +978,90 @@ class AddressBook:
             elif not results:
                 results_text.insert(tk.END, "No contacts match the query.")
             else:
-                for num, contact in results:
-                    sanitized = self._sanitize_number(contact["number"])
-                    results_text.insert(tk.END, f"{num}. {contact['first'].title()} {contact['last'].title()}\n Address: {contact['address'].title()}\n Number: {sanitized}\n\n")
-            
+                for num, contact in enumerate(results, 1):
+                    results_text.insert(tk.END, f"{num}. {contact.first} {contact.last}\n Address: {contact.address}\n Number: {contact.number}\n\n")
+                if len(results) == limit:
+                    results_text.insert(tk.END, f"Showing the first {limit} matches; refine the query to narrow them down.")
+
             results_text.config(state=tk.DISABLED)
 
+        def update_results():
+            nonlocal last_state
+            stype = search_type.get()
+            query = query_var.get().strip()
+            fuzzy = fuzzy_var.get()
+
+            # Nothing to redo if neither the query nor the contacts changed
+            state = (stype, query, fuzzy, get_contacts_version())
+            if state == last_state:
+                return
+            last_state = state
+
+            if not query:
+                self.searcher.cancel()
+                show_results(query, [], self.search_limit)
+                return
+            if fuzzy:
+                func, limit = fuzzy_search_contacts, self.fuzzy_limit
+            else:
+                func, limit = search_contacts, self.search_limit
+            self.searcher.submit(func, (stype, query, limit), lambda results: show_results(query, results, limit))
+
         query_var.trace_add("write", lambda *_: update_results())
         stype_combo.bind("<<ComboboxSelected>>", lambda _e: update_results())
 
-        ttk.Button(controls, text="Back", command=self.show_home).grid(row=0, column=4, padx=5)
-        update_results()
-        
+        def on_show():
+            # Start each visit with a blank query, as a freshly built screen would
+            search_type.set("first name")
+            fuzzy_var.set(False)
+            query_var.set("")
+            update_results()
+            query_entry.focus_set()
+
+        ttk.Button(controls, text="Back", command=self.show_home).grid(row=0, column=5, padx=5)
+        return on_show
+
+    def show_diagnostics(self):
+        """Timing collected by the instrumentation module (only offered when it is enabled)."""
+        self._show_screen("diagnostics", self._build_diagnostics)
+
+    def _build_diagnostics(self, frame):
+        tk.Label(frame, text="Diagnostics", font=("Arial", 16, "bold"), bg="#800000", fg="#FFD700").pack(pady=10)
+
+        report_text = tk.Text(frame, bg="#FFD700", fg="#800000", font=("Courier", 9), height=18, wrap=tk.NONE)
+        report_text.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
+
+        def refresh():
+            report_text.config(state=tk.NORMAL)
+            report_text.delete("1.0", tk.END)
+            report_text.insert(tk.END, instrumentation.format_report())
+            report_text.config(state=tk.DISABLED)
+
+        def reset():
+            instrumentation.reset()
+            refresh()
+
+        action_frame = tk.Frame(frame, bg="#800000")
+        action_frame.pack(pady=10)
+        ttk.Button(action_frame, text="Refresh", command=refresh).pack(side=tk.LEFT, padx=8)
+        ttk.Button(action_frame, text="Reset", command=reset).pack(side=tk.LEFT, padx=8)
+        ttk.Button(action_frame, text="Back", command=self.show_home).pack(side=tk.LEFT, padx=8)
+        return refresh
+
     def exit_app(self):
+        self.searcher.shutdown()
+        # Anything still queued is committed before the window goes away
+        self.writer.close()
         self.root.quit()
 
-    def run(self):
+    def run(self, measure_startup=False):
+        """Start the Tk loop; with `measure_startup`, print the startup timings and quit once ready."""
+        if measure_startup:
+            def report():
+                for name, seconds in self.startup_times.items():
+                    print(f"{name:<12} {seconds * 1000:8.1f} ms")
+                self.exit_app()
+            self._on_ready = report
         self.root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+"""Headless contact operations shared by the GUI, the CLI and batch jobs.
+
+Nothing here imports tkinter: validation, duplicate handling and the
+database calls live in ContactService so every front end takes the same
+code path.
+"""
+
+import contact_io
+import database
+import validation
+
+class ValidationError(ValueError):
+    """One or more fields failed validation; `errors` lists every message."""
+
+    def __init__(self, errors):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+class BookFullError(Exception):
+    def __init__(self, max_entries):
+        super().__init__(f"Address book is full (max {max_entries} entries).")
+        self.max_entries = max_entries
+
+class ContactNotFoundError(LookupError):
+    def __init__(self, contact_id):
+        super().__init__(f"No contact with id {contact_id}.")
+        self.contact_id = contact_id
+
+class ContactService:
+    def __init__(self, max_entries=None):
+        # None means unbounded
+        self.max_entries = max_entries
+
+    def initialize(self):
+        database.initialize_database()
+
+    def _clean(self, first, last, address, number):
+        """Validate the fields and return them in their stored form."""
+        row, errors = validation.check_contact(first, last, address, number)
+        if errors:
+            raise ValidationError(errors)
+        return row
+
+    def get(self, contact_id):
+        contact = database.get_contact(contact_id)
+        if contact is None:
+            raise ContactNotFoundError(contact_id)
+        return contact
+
+    def add(self, first, last, address, number):
+        """Validate and insert a contact; returns the stored contact.
+
+        Raises ValidationError, BookFullError or database.DuplicatePhoneError.
+        """
+        fields = self._clean(first, last, address, number)
+        if self.max_entries is not None and database.count_contacts() >= self.max_entries:
+            raise BookFullError(self.max_entries)
+        contact_id = database.add_contact(*fields)
+        return self.get(contact_id)
+
+    def update(self, contact_id, first=None, last=None, address=None, number=None):
+        """Validate and save a contact; fields left as None keep their current value."""
+        current = self.get(contact_id)
+        fields = self._clean(
+            current.first if first is None else first,
+            current.last if last is None else last,
+            current.address if address is None else address,
+            current.number if number is None else number,
+        )
+        database.update_contact(contact_id, *fields)
+        return self.get(contact_id)
+
+    def update_many(self, rows):
+        """Validate and save many contacts in one transaction; returns the number changed.
+
+        `rows` are (contact_id, first, last, address, number) tuples where None
+        keeps the current value, as in update(). Nothing is written unless
+        every row is valid; ValidationError lists the failures by contact id.
+        """
+        merged = []
+        for contact_id, first, last, address, number in rows:
+            current = self.get(contact_id)
+            merged.append((
+                contact_id,
+                current.first if first is None else first,
+                current.last if last is None else last,
+                current.address if address is None else address,
+                current.number if number is None else number,
+            ))
+        cleaned, errors = validation.validate_batch(merged)
+        if errors:
+            raise ValidationError([f"Contact {contact_id}: {' '.join(messages)}" for contact_id, messages in errors])
+        ids = [row[0] for row in merged]
+        return database.update_contacts([(contact_id,) + fields for contact_id, fields in zip(ids, cleaned)])
+
+    def delete(self, contact_id):
+        contact = self.get(contact_id)
+        database.delete_contact(contact_id)
+        return contact
+
+    def delete_many(self, contact_ids):
+        """Delete every listed contact in one transaction; returns how many existed."""
+        return database.delete_contacts(contact_ids)
+
+    def has_contacts(self):
+        return database.has_contacts()
+
+    def count(self):
+        return database.count_contacts()
+
+    def search(self, field, query, limit=None, fuzzy=False):
+        """Substring search, or with `fuzzy` the `limit` closest spellings/sound-alikes, best first."""
+        if fuzzy:
+            return database.fuzzy_search_contacts(field, query, limit=limit or 20)
+        return database.search_contacts(field, query, limit=limit)
+
+    def list(self, limit=100, after_id=None, order_by="id", descending=False, after=None):
+        """One page of contacts, continuing after the contact with `after_id`.
+
+        `after` may be given instead: a Contact from an earlier page, of which
+        only the id and the `order_by` field are used. Unlike `after_id` it
+        keeps working after that contact is edited or deleted.
+        """
+        if after is None and after_id is not None:
+            after = self.get(after_id)
+        return database.get_contacts_page(limit=limit, after=after, order_by=order_by, descending=descending)
+
+    def iter_all(self, order_by="id", descending=False):
+        """Stream every contact in order without holding the table in memory."""
+        return database.iter_contacts(order_by=order_by, descending=descending)
+
+    def import_file(self, path, fmt=None, batch_size=contact_io.DEFAULT_BATCH_SIZE):
+        return contact_io.import_file(path, fmt=fmt, batch_size=batch_size)
+
+    def export_file(self, path, fmt=None):
+        return contact_io.export_file(path, fmt=fmt)
@@ -0,0 +1,101 @@
+"""The HTTP API end to end: an ApiServer on a free port and a keep-alive client.
+
+    python -m pytest -q
+"""
+
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+import database
+from api_server import ApiServer
+from load_test import Connection
+
+LAST_NAMES = ["Abad", "Bautista", "Cruz", "Dizon", "Enriquez", "Flores", "Garcia"]
+
+@pytest.fixture
+def book(tmp_path, monkeypatch):
+    path = str(tmp_path / "book.db")
+    monkeypatch.setattr(database, "database_name", path)
+    monkeypatch.setattr(database, "store_spec", None)
+    database.initialize_database()
+    # Inserted out of name order, so sort=last pages differ from sort=id pages
+    for index, last in enumerate(reversed(LAST_NAMES)):
+        database.add_contact("Ana", last, f"{index} Luna St", f"0900000000{index}")
+    yield path
+    database.close_connections()
+
+def _serve(scenario):
+    """Run `scenario(request)` against a fresh server; request() returns (status, headers, JSON body)."""
+    async def run():
+        server = ApiServer(workers=2)
+        host, port = await server.start("127.0.0.1", 0)
+        connection = Connection(host, port)
+        await connection.open()
+
+        async def request(method, path, body=None, headers=None):
+            status, reply_headers, data = await connection.request(method, path, body, headers)
+            return status, reply_headers, json.loads(data) if data else None
+
+        try:
+            return await scenario(request)
+        finally:
+            connection.close()
+            await server.close()
+
+    return asyncio.run(run())
+
+def _lasts(page):
+    return [contact["last"] for contact in page["contacts"]]
+
+@pytest.mark.parametrize("change", ["edit", "delete"])
+def test_next_survives_a_changed_anchor(book, change):
+    async def scenario(request):
+        _, _, first = await request("GET", "/contacts?limit=3&sort=last")
+        assert _lasts(first) == LAST_NAMES[:3]
+        anchor = first["contacts"][-1]
+        if change == "edit":
+            status, _, _ = await request("PATCH", f"/contacts/{anchor['id']}", {"last": "Zamora"})
+        else:
+            status, _, _ = await request("DELETE", f"/contacts/{anchor['id']}")
+        assert status == 200
+        status, _, second = await request("GET", f"/contacts?limit=3&sort=last&after={first['next']}")
+        assert status == 200
+        # Picks up right after where the first page ended
+        assert _lasts(second) == LAST_NAMES[3:6]
+
+    _serve(scenario)
+
+def test_cursor_for_another_sort_is_rejected(book):
+    async def scenario(request):
+        _, _, page = await request("GET", "/contacts?limit=2&sort=last")
+        status, _, reply = await request("GET", f"/contacts?limit=2&sort=first&after={page['next']}")
+        assert status == 400
+        assert "sort=last" in reply["error"]
+        status, _, _ = await request("GET", "/contacts?limit=2&after=not-a-cursor")
+        assert status == 400
+
+    _serve(scenario)
+
+def test_write_from_another_connection_changes_the_etag(book):
+    async def scenario(request):
+        status, headers, page = await request("GET", "/contacts?limit=50")
+        assert status == 200
+        etag = headers["etag"]
+        status, _, _ = await request("GET", "/contacts?limit=50", headers={"If-None-Match": etag})
+        assert status == 304
+
+        # Another process writing to the same file, bypassing this server's store
+        other = sqlite3.connect(book)
+        with other:
+            other.execute('DELETE FROM contacts WHERE id = ?', (page["contacts"][0]["id"],))
+        other.close()
+
+        status, headers, fresh = await request("GET", "/contacts?limit=50", headers={"If-None-Match": etag})
+        assert status == 200
+        assert headers["etag"] != etag
+        assert len(fresh["contacts"]) == len(LAST_NAMES) - 1
+
+    _serve(scenario)
@@ -0,0 +1,54 @@
+"""Import and export through every format, against the default store.
+
+    python -m pytest -q
+"""
+
+import pytest
+
+import contact_io
+import database
+import validation
+
+CONTACTS = [
+    ("Ana", "Cruz", "1 Luna St, Makati City", "09000000001"),
+    ("Juan Paolo", "Dela Cruz", "55 Magsaysay Ave; Brgy. Capitol Site", "09000000002"),
+    ("Ben", "Reyes", "Unit 4\\B, Rizal St", "09000000003"),
+]
+
+@pytest.fixture
+def book(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "database_name", str(tmp_path / "book.db"))
+    monkeypatch.setattr(database, "store_spec", None)
+    database.initialize_database()
+    yield
+    database.close_connections()
+
+def _stored():
+    return [contact[1:] for contact in database.get_all_contacts()]
+
+@pytest.mark.parametrize("extension", ["csv", "jsonl", "vcf"])
+def test_round_trip(book, tmp_path, extension):
+    contact_io.import_contacts(enumerate(dict(zip(contact_io.FIELDS, row)) for row in CONTACTS))
+    path = str(tmp_path / f"book.{extension}")
+    assert contact_io.export_file(path) == len(CONTACTS)
+    database.delete_contacts([contact.id for contact in database.get_all_contacts()])
+    report = contact_io.import_file(path)
+    assert (report.imported, report.duplicates, report.errors) == (len(CONTACTS), 0, [])
+    assert _stored() == CONTACTS
+    # Importing the same file again only finds duplicates
+    assert contact_io.import_file(path).duplicates == len(CONTACTS)
+
+def test_csv_with_byte_order_mark(book, tmp_path):
+    path = tmp_path / "excel.csv"
+    path.write_text("First Name,Last Name,Address,Phone\r\nana,cruz,1 luna st,0900-000-0001\r\n", encoding="utf-8-sig")
+    assert path.read_bytes().startswith(b"\xef\xbb\xbf")
+    report = contact_io.import_file(str(path))
+    assert (report.imported, report.errors) == (1, [])
+    assert _stored() == [("Ana", "Cruz", "1 Luna St", "09000000001")]
+
+def test_numbers_longer_than_11_digits_are_rejected(book, tmp_path):
+    path = tmp_path / "long.csv"
+    path.write_text("first,last,address,number\nana,cruz,1 luna st,090000000012\n", encoding="utf-8")
+    report = contact_io.import_file(str(path))
+    assert (report.imported, report.errors) == (0, [(2, validation.NUMBER_INVALID)])
+    assert _stored() == []
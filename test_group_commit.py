@@ -0,0 +1,75 @@
+"""Group commit: when grouped writes reach the shared cache, and how the
+background WriteQueue reports a group it could not write.
+
+    python -m pytest -q
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+import database
+from database import SQLiteStore
+from write_queue import WriteQueue
+
+def test_grouped_writes_reach_the_cache_after_commit(tmp_path):
+    store = SQLiteStore(str(tmp_path / "book.db"))
+    store.initialize()
+    store.add_contact("Ana", "Cruz", "1 Luna St", "09000000001")
+    written, read = threading.Event(), threading.Event()
+
+    def writer(fail):
+        try:
+            with store.group_commit():
+                store.add_contact("Ben", "Cruz", "2 Luna St", "09000000002")
+                written.set()
+                read.wait()
+                if fail:
+                    raise RuntimeError
+        except RuntimeError:
+            pass
+
+    for fail, expected in ((True, 1), (False, 2)):
+        written.clear()
+        read.clear()
+        thread = threading.Thread(target=writer, args=(fail,))
+        thread.start()
+        written.wait()
+        # This thread loads the cache while the group is still open: committed rows only
+        store.invalidate_cache()
+        assert len(store.get_all_contacts()) == 1
+        version = store.get_contacts_version()
+        read.set()
+        thread.join()
+        assert store.count_contacts() == len(store.get_all_contacts()) == expected
+        assert (store.get_contacts_version() != version) == (not fail)
+    store.close()
+
+@pytest.fixture
+def book(tmp_path, monkeypatch):
+    # The default store on a fresh file, giving up on a locked database after 50 ms instead of 5 s
+    path = str(tmp_path / "book.db")
+    monkeypatch.setattr(database, "database_name", path)
+    monkeypatch.setattr(database, "store_spec", None)
+    monkeypatch.setattr(database, "PRAGMAS", database.PRAGMAS + (("busy_timeout", 50),))
+    database.initialize_database()
+    yield path
+    database.close_connections()
+
+def test_write_queue_fails_jobs_when_the_group_cannot_begin(book):
+    other = sqlite3.connect(book, isolation_level=None)
+    other.execute('BEGIN IMMEDIATE')
+    writer = WriteQueue()
+    try:
+        futures = [writer.submit(database.add_contact, "Ana", "Cruz", "1 Luna St", f"0900000000{index}") for index in range(3)]
+        for future in futures:
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                future.result(timeout=10)
+        other.execute('ROLLBACK')
+        # The writer thread is still alive and the next batch goes through
+        assert writer.submit(database.add_contact, "Ana", "Cruz", "1 Luna St", "09000000001").result(timeout=10)
+        assert database.count_contacts() == 1
+    finally:
+        other.close()
+        writer.close()
@@ -0,0 +1,55 @@
+"""Schema migrations on books written by older releases.
+
+    python -m pytest -q
+"""
+
+import sqlite3
+import threading
+
+import database
+from database import SQLiteStore
+
+def _old_book(path, rows):
+    # A book as the first release left it: no indexes and duplicate numbers allowed
+    conn = sqlite3.connect(path)
+    database._migration_1(conn)
+    conn.executemany('INSERT INTO contacts (first_name, last_name, address, phone_number) VALUES (?, ?, ?, ?)', rows)
+    conn.execute('PRAGMA user_version = 1')
+    conn.commit()
+    conn.close()
+
+def test_concurrent_openers_migrate_once(tmp_path):
+    path = str(tmp_path / "old.db")
+    _old_book(path, [("ana", "cruz", f"{index} luna st", f"09{index:09d}") for index in range(20)])
+    stores = [SQLiteStore(path) for _ in range(4)]
+    barrier, errors = threading.Barrier(len(stores)), []
+
+    def open_book(store):
+        barrier.wait()
+        try:
+            store.initialize()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_book, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert stores[0].get_schema_version() == len(database.MIGRATIONS)
+    assert stores[0].count_contacts() == 20
+    for store in stores:
+        store.close()
+
+def test_duplicate_numbers_are_kept_aside(tmp_path):
+    path = str(tmp_path / "old.db")
+    _old_book(path, [("ana", "cruz", "1 luna st", "09000000001"),
+                     ("ben", "cruz", "2 luna st", "09000000001"),
+                     ("carlo", "cruz", "3 luna st", "09000000002")])
+    store = SQLiteStore(path)
+    store.initialize()
+    assert [c.first for c in store.get_all_contacts()] == ["Ana", "Carlo"]
+    removed = store.get_connection().execute('SELECT id, first_name, kept_id FROM removed_duplicates').fetchall()
+    assert removed == [(2, "ben", 1)]
+    store.close()
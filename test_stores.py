@@ -0,0 +1,125 @@
+"""Store behaviour that is easy to break and hard to see from the GUI: sharded
+paging and batches against a single file, and nested group rollback.
+
+    python -m pytest -q
+"""
+
+import random
+
+import pytest
+
+import database
+from database import DuplicatePhoneError, SORT_COLUMNS, SQLiteStore, ShardedStore
+
+NAMES = ["Ana", "Ben", "Carlo", "Dina", "Eli"]
+
+def _rows(count, seed=7):
+    # Few distinct names, so every text sort has long runs of ties broken by id
+    rng = random.Random(seed)
+    return [(rng.choice(NAMES), rng.choice(NAMES), f"{rng.randint(1, 9)} Luna St", f"09{index:09d}")
+            for index in range(count)]
+
+def _fields(contacts):
+    return sorted(contact[1:] for contact in contacts)
+
+def _walk_forward(store, order_by, descending, limit=7):
+    contacts, after = [], None
+    while True:
+        page = store.get_contacts_page(limit=limit, after=after, order_by=order_by, descending=descending)
+        contacts += page
+        if len(page) < limit:
+            return contacts
+        after = page[-1]
+
+def _walk_backward(store, last, order_by, descending, limit=7):
+    contacts, before = [], last
+    while True:
+        page = store.get_contacts_page(limit=limit, before=before, order_by=order_by, descending=descending)
+        contacts[:0] = page
+        if len(page) < limit:
+            return contacts
+        before = page[0]
+
+@pytest.fixture
+def stores(tmp_path):
+    single = SQLiteStore(str(tmp_path / "single.db"))
+    sharded = ShardedStore(str(tmp_path / "shards"), shards=3)
+    for store in (single, sharded):
+        store.initialize()
+        with store.bulk_insert() as insert:
+            insert(_rows(100))
+    yield single, sharded
+    single.close()
+    sharded.close()
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("order_by", list(SORT_COLUMNS))
+def test_sharded_pages_match_single_file(stores, order_by, descending):
+    single, sharded = stores
+    key = database._sort_key(order_by)
+    for store in (single, sharded):
+        expected = sorted(store.get_all_contacts(), key=key, reverse=descending)
+        assert _walk_forward(store, order_by, descending) == expected
+        assert _walk_backward(store, expected[-1], order_by, descending) == expected[:-1]
+    # Ids differ between the layouts, so compare the sort values and the contacts themselves
+    single_walk, sharded_walk = _walk_forward(single, order_by, descending), _walk_forward(sharded, order_by, descending)
+    if order_by != "id":
+        assert [getattr(c, order_by) for c in single_walk] == [getattr(c, order_by) for c in sharded_walk]
+    assert _fields(single_walk) == _fields(sharded_walk)
+
+def test_sharded_rejects_numbers_taken_in_another_shard(stores):
+    _, sharded = stores
+    taken = sharded.get_all_contacts()[0].number
+    with pytest.raises(DuplicatePhoneError):
+        sharded.add_contact("Fe", "Cruz", "1 Luna St", taken)
+    assert sharded.count_contacts() == 100
+
+def test_sharded_batch_rolls_back_every_shard(stores):
+    _, sharded = stores
+    contacts = sharded.get_all_contacts()
+    by_shard = {}
+    for contact in contacts:
+        by_shard.setdefault(contact.id % len(sharded.shards), []).append(contact)
+    first = by_shard[0][0]
+    second, third = by_shard[1][:2]
+    # Shard 0's update is written first, then shard 1's unique index rejects the
+    # reused number; the whole batch has to come back out
+    with pytest.raises(DuplicatePhoneError):
+        sharded.update_contacts([(first.id, "Changed", first.last, first.address, first.number),
+                                 (third.id, third.first, third.last, third.address, second.number)])
+    assert sharded.get_all_contacts() == contacts
+    sharded.invalidate_cache()
+    assert sharded.get_all_contacts() == contacts
+
+def test_nested_group_rollback_keeps_the_outer_writes(tmp_path):
+    store = SQLiteStore(str(tmp_path / "book.db"))
+    store.initialize()
+    store.get_all_contacts()  # load the cache, so its patches are exercised
+    with store.group_commit():
+        kept = store.add_contact("Ana", "Cruz", "1 Luna St", "09000000001")
+        with pytest.raises(RuntimeError):
+            with store.group_commit():
+                store.add_contact("Ben", "Cruz", "2 Luna St", "09000000002")
+                raise RuntimeError
+    assert [c.id for c in store.get_all_contacts()] == [kept]
+    store.invalidate_cache()
+    assert [c.id for c in store.get_all_contacts()] == [kept]
+    store.close()
+
+def test_backends_must_implement_every_method():
+    class Partial(database.ContactStore):
+        def initialize(self):
+            pass
+
+    with pytest.raises(TypeError, match="abstract"):
+        Partial()
+
+def test_raw_connections_need_a_single_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "store_spec", f"sharded:2:{tmp_path / 'shards'}")
+    try:
+        with pytest.raises(TypeError, match="single SQLite file"):
+            database.get_connection()
+        with pytest.raises(TypeError, match="single SQLite file"):
+            database.connection()
+    finally:
+        database.close_connections()
@@ -0,0 +1,29 @@
+"""The field rules shared by the GUI, the CLI, the API and imports.
+
+    python -m pytest -q
+"""
+
+import pytest
+
+import validation
+
+@pytest.mark.parametrize("number", ["0900000000", "090000000012", "0900-000-0001-2"])
+def test_numbers_must_have_exactly_11_digits(number):
+    row, errors = validation.check_contact("Ana", "Cruz", "1 Luna St", number)
+    assert row is None
+    assert errors == [validation.NUMBER_INVALID]
+    assert validation.validate_number(number) == (False, validation.NUMBER_INVALID)
+
+def test_separators_are_dropped_from_valid_numbers():
+    row, errors = validation.check_contact(" ana ", "cruz", "1 luna st", "0900 000-0001")
+    assert (row, errors) == (("Ana", "Cruz", "1 Luna St", "09000000001"), [])
+
+def test_sanitize_number_only_shortens_for_display():
+    assert validation.sanitize_number("090000000012") == "09000000001"
+    assert validation.validate_contact("Ana", "Cruz", "1 Luna St", "090000000012") == [validation.NUMBER_INVALID]
+
+def test_batch_keeps_valid_rows_and_reports_the_rest():
+    rows, errors = validation.validate_batch([(2, "Ana", "Cruz", "1 Luna St", "09000000001"),
+                                              (3, "Ben", "Cruz", "2 Luna St", "090000000012")])
+    assert rows == [("Ana", "Cruz", "1 Luna St", "09000000001")]
+    assert errors == [(3, [validation.NUMBER_INVALID])]
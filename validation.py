@@ -0,0 +1,100 @@
+import re
+from functools import lru_cache
+
+# Compiled once at import instead of on every call
+_NAME_PATTERN = re.compile(r"[a-zA-Z\s]+")
+_NON_DIGIT_PATTERN = re.compile(r"\D")
+
+# str.translate table deleting every ASCII character that is not a digit
+_ASCII_NON_DIGITS = {code: None for code in range(128) if not chr(code).isdigit()}
+
+NAME_EMPTY = "Name cannot be empty."
+NAME_INVALID = "Name must contain only letters and spaces."
+ADDRESS_EMPTY = "Address cannot be empty."
+NUMBER_INVALID = "Contact number must be exactly 11 digits."
+
+@lru_cache(maxsize=8192)
+def _check_name(name):
+    # Names repeat heavily across an import, so (normalized, error) is memoized
+    stripped = name.strip()
+    if not stripped:
+        return None, NAME_EMPTY
+    if not _NAME_PATTERN.fullmatch(name):
+        return None, NAME_INVALID
+    return stripped.title(), ""
+
+def validate_name(name):
+    """Validate name: not empy, only letters and spaces."""
+    error = _check_name(name)[1]
+    return not error, error
+
+def validate_address(address):
+    """validate address: not empty."""
+    if not address.strip():
+        return False, ADDRESS_EMPTY
+    return True, ""
+
+def validate_number(number):
+    """Validate contact number: exactly 11 digits."""
+    if len(number_digits(number)) != 11:
+        return False, NUMBER_INVALID
+    return True, ""
+
+def number_digits(number: str) -> str:
+    """Every digit of `number`, separators dropped; the stored form once validated."""
+    if not (number.isdigit() and number.isascii()):
+        number = number.translate(_ASCII_NON_DIGITS)
+        if not number.isascii():
+            # Rare: non-ASCII characters left over, fall back to the Unicode-aware pattern
+            number = _NON_DIGIT_PATTERN.sub("", number)
+    return number
+
+def sanitize_number(number: str) -> str:
+    """Digits only, capped at 11 to fit the GUI's number field (display only, never for storage)"""
+    return number_digits(number)[:11]
+
+def check_contact(first, last, address, number):
+    """Validate and normalize one contact.
+
+    Returns (row, errors): `row` is the (first, last, address, number) tuple in
+    stored form, or None when `errors` (the list of messages) is not empty.
+    """
+    first, first_error = _check_name(first)
+    last, last_error = _check_name(last)
+    address = address.strip()
+    # Checked in full: truncating first would save a different, valid-looking number
+    number = number_digits(number)
+    errors = []
+    if first_error:
+        errors.append(first_error)
+    if last_error:
+        errors.append(last_error)
+    if not address:
+        errors.append(ADDRESS_EMPTY)
+    if len(number) != 11:
+        errors.append(NUMBER_INVALID)
+    if errors:
+        return None, errors
+    return (first, last, address.title(), number), errors
+
+def validate_contact(first, last, address, number):
+    """Run every field check; returns the list of error messages (empty when valid)."""
+    return check_contact(first, last, address, number)[1]
+
+def validate_batch(records):
+    """Validate and normalize many contacts in one call.
+
+    `records` yields (key, first, last, address, number) tuples, where `key`
+    identifies the row to the caller (e.g. a line number). Returns
+    (rows, errors): the normalized rows that passed, and (key, messages)
+    pairs for the ones that did not.
+    """
+    rows, errors = [], []
+    add_row, add_error, check = rows.append, errors.append, check_contact
+    for key, first, last, address, number in records:
+        row, messages = check(first, last, address, number)
+        if row is None:
+            add_error((key, messages))
+        else:
+            add_row(row)
+    return rows, errors
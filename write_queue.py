@@ -0,0 +1,99 @@
+"""Serialized background writes with group commit.
+
+Every mutation is queued to one writer thread, which runs it on that
+thread's pooled connection. Jobs that pile up while a transaction is being
+written are drained together and committed with database.group_commit(),
+so a burst of edits costs one commit instead of one per edit. Callers get a
+concurrent.futures.Future that resolves only once the job's transaction has
+committed (or with the job's own exception, e.g. DuplicatePhoneError).
+
+Nothing here imports tkinter; the GUI polls the futures with root.after().
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+
+import database
+import instrumentation
+
+DEFAULT_MAX_BATCH = 200
+
+_STOP = object()
+
+class WriteQueue:
+    def __init__(self, max_batch=DEFAULT_MAX_BATCH):
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) for the writer thread; returns a Future."""
+        if self._closed:
+            raise RuntimeError("WriteQueue is closed")
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def pending(self):
+        """Approximate number of jobs not yet picked up by the writer."""
+        return self._queue.qsize()
+
+    def close(self, wait=True):
+        """Stop accepting jobs; queued ones are still written before the thread exits."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+        if wait:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            batch = [job]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    stop = True
+                    break
+                batch.append(job)
+            self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch):
+        outcomes = []
+        try:
+            with instrumentation.timed("write_queue.batch") as span, database.group_commit():
+                span.rows = len(batch)
+                for future, func, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        outcomes.append(None)
+                        continue
+                    try:
+                        outcomes.append((True, func(*args, **kwargs)))
+                    except Exception as e:
+                        outcomes.append((False, e))
+        except Exception as e:
+            # The transaction could not be opened or committed, so none of the
+            # batch was saved; jobs it never reached are still pending
+            for future, *_ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (future, *_), outcome in zip(batch, outcomes):
+            if outcome is None:
+                continue
+            ok, value = outcome
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)